@@ -3,22 +3,33 @@
 import os
 import sys
 import re
+import time
 from rich.console import Console
+from rich.live import Live
 from rich.panel import Panel
 from rich.markdown import Markdown
 from colorama import init, Fore, Style
 
 from core.config import settings
-from core.database import init_db
+from core.database import init_db, SessionLocal
 from services.chat_service import ChatService
 from services.router import AIRouter
-from tools.tool_manager import ToolManager  # NEW
 
 # Initialize colorama
 init()
 
 console = Console()
 
+# Web search trigger phrases, matched in a single pass
+_SEARCH_RE = re.compile(
+    r"\b(?:search for|google|find information about|look up|what is the latest|"
+    r"current news|search the web|search|find)\b",
+    re.IGNORECASE
+)
+
+# Pulls the search query out of a message that triggered a search
+_QUERY_RE = re.compile(r'(?:search|find|look up|google)\s+(?:for\s+)?(.+)', re.IGNORECASE)
+
 
 def print_banner():
     """Print welcome banner."""
@@ -62,25 +73,143 @@ def detect_web_search_intent(message: str) -> bool:
     Returns:
         True if web search is needed
     """
-    search_keywords = [
-        'search for', 'google', 'find information about',
-        'look up', 'what is the latest', 'current news',
-        'search the web', 'search', 'find'
-    ]
-    
-    message_lower = message.lower()
-    return any(keyword in message_lower for keyword in search_keywords)
+    return _SEARCH_RE.search(message) is not None
+
+
+def _cmd_exit(router, chat_service, tool_manager, arg):
+    """Exit the program."""
+    console.print("\n[bold yellow]Goodbye! 👋[/bold yellow]\n")
+    return True
+
+
+def _cmd_help(router, chat_service, tool_manager, arg):
+    """Show help."""
+    print_help()
+
+
+def _cmd_groq(router, chat_service, tool_manager, arg):
+    """Force Groq AI."""
+    router.set_provider("groq")
+    console.print("[green]✓ Switched to Groq AI[/green]\n")
+
+
+def _cmd_gemini(router, chat_service, tool_manager, arg):
+    """Force Gemini AI."""
+    router.set_provider("gemini")
+    console.print("[green]✓ Switched to Gemini AI[/green]\n")
+
+
+def _cmd_auto(router, chat_service, tool_manager, arg):
+    """Enable auto-routing."""
+    router.set_provider("auto")
+    console.print("[green]✓ Auto-routing enabled[/green]\n")
+
+
+def _cmd_clear(router, chat_service, tool_manager, arg):
+    """Start a new conversation."""
+    chat_service.clear_history()
+    console.print("[green]✓ Conversation cleared[/green]\n")
+
+
+def _cmd_history(router, chat_service, tool_manager, arg):
+    """Show conversation history."""
+    history = chat_service.get_history()
+    if history:
+        console.print("\n[bold]Conversation History:[/bold]\n")
+        for msg in history:
+            role = "You" if msg['role'] == 'user' else 'AI'
+            color = "blue" if msg['role'] == 'user' else 'green'
+            console.print(f"[{color}]{role}:[/{color}] {msg['content']}\n")
+    else:
+        console.print("[yellow]No conversation history yet.[/yellow]\n")
+
+
+def _cmd_screenshot(router, chat_service, tool_manager, arg):
+    """Take a screenshot."""
+    result = tool_manager.take_screenshot()
+    console.print(f"[green]{result}[/green]\n")
+
+
+def _cmd_search(router, chat_service, tool_manager, query):
+    """Search the web."""
+    with console.status("[bold green]Searching...", spinner="dots"):
+        result = tool_manager.web_search(query)
+    console.print("\n[bold green]Search Results:[/bold green]")
+    console.print(Panel(Markdown(result), border_style="green"))
+    console.print()
+
+
+def _cmd_read(router, chat_service, tool_manager, url):
+    """Read a webpage."""
+    with console.status("[bold green]Reading webpage...", spinner="dots"):
+        result = tool_manager.read_webpage(url)
+    console.print("\n[bold green]Webpage Content:[/bold green]")
+    console.print(Panel(Markdown(result), border_style="green"))
+    console.print()
+
+
+def _cmd_open(router, chat_service, tool_manager, app):
+    """Open an application."""
+    result = tool_manager.open_app(app)
+    console.print(f"[green]{result}[/green]\n")
+
+
+def _cmd_code(router, chat_service, tool_manager, code):
+    """Execute Python code."""
+    with console.status("[bold green]Executing code...", spinner="dots"):
+        result = tool_manager.execute_code(code)
+    console.print(Panel(Markdown(result), border_style="green"))
+
+
+def _cmd_calc(router, chat_service, tool_manager, expr):
+    """Evaluate an expression."""
+    result = tool_manager.calculate(expr)
+    console.print(f"[green]{result}[/green]\n")
+
+
+def _cmd_agent(router, chat_service, tool_manager, task):
+    """Run a task through the multi-agent system."""
+    with console.status("[bold green]Multi-agent processing...", spinner="dots"):
+        from services.agent_system import agent_system
+        if agent_system:
+            results = agent_system.execute_task(task)
+            console.print(Panel(Markdown(results['final']), border_style="green"))
+
+
+# Commands used on their own, e.g. `!help`
+_CMD_TABLE = {
+    "!exit": _cmd_exit,
+    "!quit": _cmd_exit,
+    "!help": _cmd_help,
+    "!groq": _cmd_groq,
+    "!gemini": _cmd_gemini,
+    "!auto": _cmd_auto,
+    "!clear": _cmd_clear,
+    "!history": _cmd_history,
+    "!screenshot": _cmd_screenshot,
+}
+
+# Commands that take an argument, e.g. `!search <query>`
+_ARG_CMD_TABLE = {
+    "!search": _cmd_search,
+    "!read": _cmd_read,
+    "!open": _cmd_open,
+    "!code": _cmd_code,
+    "!calc": _cmd_calc,
+    "!agent": _cmd_agent,
+}
 
 
 def main():
     """Main CLI loop."""
+    # Fail fast on missing configuration
+    settings.validate()
+    
     # Initialize database
     init_db()
     
     # Initialize services
     router = AIRouter()
-    chat_service = ChatService(router)
-    tool_manager = ToolManager()  # NEW
     
     # Print banner
     print_banner()
@@ -88,6 +217,27 @@ def main():
     
     console.print("\n[bold green]Ready![/bold green] Start chatting or type !help for commands.\n")
     
+    with ChatService(router, SessionLocal()) as chat_service:
+        # Share the chat service's tools rather than building a second set
+        _chat_loop(router, chat_service, chat_service.tool_manager)
+
+
+def _render_stream(chunks):
+    """Render streamed Markdown, re-rendering at most ~10 times a second."""
+    parts = []
+    last_render = 0.0
+    with Live(Panel(Markdown(""), border_style="green"), console=console) as live:
+        for chunk in chunks:
+            parts.append(chunk)
+            now = time.monotonic()
+            if now - last_render >= 0.1:
+                live.update(Panel(Markdown("".join(parts)), border_style="green"))
+                last_render = now
+        live.update(Panel(Markdown("".join(parts)), border_style="green"))
+
+
+def _chat_loop(router, chat_service, tool_manager):
+    """Read and answer user input until the user exits."""
     # Main loop
     while True:
         try:
@@ -99,111 +249,23 @@ def main():
             
             # Handle commands
             if user_input.startswith("!"):
-                command = user_input.lower()
+                name, _, arg = user_input.partition(" ")
+                name = name.lower()
+                arg = arg.strip()
+                handler = _ARG_CMD_TABLE.get(name) if arg else _CMD_TABLE.get(name)
                 
-                if command in ["!exit", "!quit"]:
-                    console.print("\n[bold yellow]Goodbye! 👋[/bold yellow]\n")
+                if handler is None:
+                    console.print(f"[red]Unknown command: {user_input.lower()}[/red]\n")
+                elif handler(router, chat_service, tool_manager, arg):
                     break
-                    
-                elif command == "!help":
-                    print_help()
-                    continue
-                    
-                elif command == "!groq":
-                    router.set_provider("groq")
-                    console.print("[green]✓ Switched to Groq AI[/green]\n")
-                    continue
-                    
-                elif command == "!gemini":
-                    router.set_provider("gemini")
-                    console.print("[green]✓ Switched to Gemini AI[/green]\n")
-                    continue
-                    
-                elif command == "!auto":
-                    router.set_provider("auto")
-                    console.print("[green]✓ Auto-routing enabled[/green]\n")
-                    continue
-                    
-                elif command == "!clear":
-                    chat_service.clear_history()
-                    console.print("[green]✓ Conversation cleared[/green]\n")
-                    continue
-                    
-                elif command == "!history":
-                    history = chat_service.get_history()
-                    if history:
-                        console.print("\n[bold]Conversation History:[/bold]\n")
-                        for msg in history:
-                            role = "You" if msg['role'] == 'user' else 'AI'
-                            color = "blue" if msg['role'] == 'user' else 'green'
-                            console.print(f"[{color}]{role}:[/{color}] {msg['content']}\n")
-                    else:
-                        console.print("[yellow]No conversation history yet.[/yellow]\n")
-                    continue
-                
-                # NEW: Web search command
-                elif command.startswith("!search "):
-                    query = user_input[8:].strip()
-                    with console.status("[bold green]Searching...", spinner="dots"):
-                        result = tool_manager.web_search(query)
-                    console.print("\n[bold green]Search Results:[/bold green]")
-                    console.print(Panel(Markdown(result), border_style="green"))
-                    console.print()
-                    continue
-                
-                # NEW: Read webpage command
-                elif command.startswith("!read "):
-                    url = user_input[6:].strip()
-                    with console.status("[bold green]Reading webpage...", spinner="dots"):
-                        result = tool_manager.read_webpage(url)
-                    console.print("\n[bold green]Webpage Content:[/bold green]")
-                    console.print(Panel(Markdown(result), border_style="green"))
-                    console.print()
-                    continue
-
-                elif command.startswith("!open "):
-                    app = user_input[6:].strip()
-                    result = tool_manager.open_app(app)
-                    console.print(f"[green]{result}[/green]\n")
-                    continue
-
-                elif command.startswith("!code "):
-                    code = user_input[6:].strip()
-                    with console.status("[bold green]Executing code...", spinner="dots"):
-                        result = tool_manager.execute_code(code)
-                    console.print(Panel(Markdown(result), border_style="green"))
-                    continue
-
-                elif command.startswith("!calc "):
-                    expr = user_input[6:].strip()
-                    result = tool_manager.calculate(expr)
-                    console.print(f"[green]{result}[/green]\n")
-                    continue
-
-                elif command == "!screenshot":
-                    result = tool_manager.take_screenshot()
-                    console.print(f"[green]{result}[/green]\n")
-                    continue
-
-                elif command.startswith("!agent "):
-                    task = user_input[7:].strip()
-                    with console.status("[bold green]Multi-agent processing...", spinner="dots"):
-                        from services.agent_system import agent_system
-                        if agent_system:
-                            results = agent_system.execute_task(task)
-                            console.print(Panel(Markdown(results['final']), border_style="green"))
-                    continue
-                    
-                else:
-                    console.print(f"[red]Unknown command: {command}[/red]\n")
-                    continue
+                continue
             
             # Check if we should auto-search
             should_search = detect_web_search_intent(user_input)
             
             if should_search:
                 # Extract search query (simple extraction)
-                query_match = re.search(r'(?:search|find|look up|google)\s+(?:for\s+)?(.+)', user_input, re.IGNORECASE)
+                query_match = _QUERY_RE.search(user_input)
                 if query_match:
                     query = query_match.group(1).strip()
                     
@@ -214,14 +276,14 @@ def main():
                     enhanced_prompt = f"{user_input}\n\nWeb Search Results:\n{search_results}"
                     user_input = enhanced_prompt
             
-            # Send message and get response
+            # Send message; the spinner runs until the first tokens arrive
             with console.status("[bold green]AI is thinking...", spinner="dots"):
-                response, provider = chat_service.send_message(user_input)
+                chunks, provider = chat_service.stream_message(user_input)
             
-            # Display response
+            # Display response as it streams in
             provider_badge = f"[{provider.upper()}]"
             console.print(f"\n[bold green]AI {provider_badge}:[/bold green]")
-            console.print(Panel(Markdown(response), border_style="green"))
+            _render_stream(chunks)
             console.print()
             
         except KeyboardInterrupt:
@@ -0,0 +1,117 @@
+"""In-memory caching helpers."""
+
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time."""
+    
+    def __init__(self, maxsize: int = 128, ttl: float = 300):
+        """Initialize cache.
+        
+        Args:
+            maxsize: Maximum number of entries
+            ttl: Seconds an entry stays valid
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a value.
+        
+        Args:
+            key: Cache key
+        
+        Returns:
+            Cached value, or None if missing or expired
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            
+            stored_at, value = item
+            if time.monotonic() - stored_at >= self.ttl:
+                del self._data[key]
+                return None
+            
+            self._data.move_to_end(key)
+            return value
+    
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full.
+        
+        Args:
+            key: Cache key
+            value: Value to store
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def ttl_cache(maxsize: int = 128, ttl: float = 300, cache_if: Optional[Callable[[Any], bool]] = None):
+    """Memoize a function in a TTLCache, keyed on its arguments.
+    
+    The wrapper gains cache_clear() and cache_contains(*args, **kwargs).
+    Keys are normalized against the signature, so positional, keyword and
+    defaulted spellings of the same call hit the same entry.
+    Every caller gets the same cached object, so results must be treated
+    as read-only; mutating one changes what later calls return.
+    
+    Args:
+        maxsize: Maximum number of entries
+        ttl: Seconds an entry stays valid
+        cache_if: Predicate on the result; results it rejects (e.g. errors)
+            are returned but not stored
+    """
+    def decorator(func: Callable) -> Callable:
+        cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        signature = inspect.signature(func)
+        parameters = signature.parameters
+        
+        def make_key(args: tuple, kwargs: dict) -> Hashable:
+            # Bound to the signature so f(x), f(x, 3) and f(x, n=3) share an entry
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return tuple(
+                tuple(sorted(value.items()))
+                if parameters[name].kind is inspect.Parameter.VAR_KEYWORD
+                else value
+                for name, value in bound.arguments.items()
+            )
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            value = cache.get(key)
+            if value is not None:
+                return value
+            
+            value = func(*args, **kwargs)
+            if cache_if is None or cache_if(value):
+                cache.set(key, value)
+            return value
+        
+        wrapper.cache_clear = cache.clear
+        wrapper.cache_contains = lambda *args, **kwargs: cache.get(make_key(args, kwargs)) is not None
+        return wrapper
+    
+    return decorator
@@ -1,29 +1,49 @@
 """Configuration management."""
 
 import os
+from dataclasses import dataclass, field
+from functools import cache
 from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Project root, resolved once at import
+_BASE_DIR = Path(__file__).resolve().parents[1]
 
+
+@cache
+def _ensure_dir(path: Path) -> None:
+    """Create a directory at most once per process."""
+    path.mkdir(exist_ok=True)
+
+
+@dataclass(frozen=True, slots=True)
 class Settings:
-    """Application settings."""
+    """Application settings, read from the environment once at import."""
     
     # API Keys
-    GROQ_API_KEY: str = os.getenv("GROQ_API_KEY", "")
-    GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
+    GROQ_API_KEY: str = field(default=os.getenv("GROQ_API_KEY", ""), repr=False)
+    GEMINI_API_KEY: str = field(default=os.getenv("GEMINI_API_KEY", ""), repr=False)
     
     # Provider Configuration
     DEFAULT_PROVIDER: str = os.getenv("DEFAULT_PROVIDER", "auto")
     ROUTING_TOKEN_THRESHOLD: int = int(os.getenv("ROUTING_TOKEN_THRESHOLD", "1000"))
     MAX_RETRIES: int = int(os.getenv("MAX_RETRIES", "3"))
+    SPECULATIVE_DISPATCH: bool = os.getenv("SPECULATIVE_DISPATCH", "false").lower() == "true"
+    SPECULATIVE_BAND: float = float(os.getenv("SPECULATIVE_BAND", "0.25"))
     
     # Model Configuration
     GROQ_MODEL: str = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
     GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-exp")
     
+    # Semantic response cache
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.87"))
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+    EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///data/assistant.db")
     
@@ -32,14 +52,14 @@ class Settings:
     LOG_FILE: str = os.getenv("LOG_FILE", "logs/assistant.log")
     
     # Paths
-    BASE_DIR: Path = Path(__file__).parent.parent
+    BASE_DIR: Path = _BASE_DIR
     DATA_DIR: Path = BASE_DIR / "data"
     LOGS_DIR: Path = BASE_DIR / "logs"
     
-    def __init__(self):
-        """Initialize settings and create directories."""
-        self.DATA_DIR.mkdir(exist_ok=True)
-        self.LOGS_DIR.mkdir(exist_ok=True)
+    def __post_init__(self):
+        """Create data and log directories."""
+        _ensure_dir(self.DATA_DIR)
+        _ensure_dir(self.LOGS_DIR)
     
     def validate(self):
         """Validate required settings."""
@@ -47,4 +67,10 @@ class Settings:
             raise ValueError("GROQ_API_KEY is required. Please set it in .env file.")
 
 
-settings = Settings()
\ No newline at end of file
+@cache
+def get_settings() -> Settings:
+    """Get the shared settings instance."""
+    return Settings()
+
+
+settings = get_settings()
\ No newline at end of file
@@ -1,7 +1,7 @@
 """Chat database models."""
 
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from core.database import Base
 
@@ -22,6 +22,10 @@ class Conversation(Base):
 class Message(Base):
     """Message model."""
     __tablename__ = "messages"
+    __table_args__ = (
+        # Serves history lookups: WHERE conversation_id = ? ORDER BY timestamp
+        Index("ix_msg_conv_ts", "conversation_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False)
@@ -2,6 +2,7 @@
 
 from typing import Dict, List, Optional, Any
 from enum import Enum
+import concurrent.futures
 from core.logger import logger
 from services.router import AIRouter
 
@@ -18,51 +19,60 @@ class AgentRole(Enum):
 class Agent:
     """Individual AI agent with specialized role."""
     
-    def __init__(self, role: AgentRole, router: AIRouter):
-        """Initialize agent.
-        
-        Args:
-            role: Agent role
-            router: AI router
-        """
-        self.role = role
-        self.router = router
-        self.system_prompts = {
-            AgentRole.RESEARCHER: """You are a research specialist. Your job is to:
+    __slots__ = ("role", "router")
+    
+    _SYSTEM_PROMPTS: Dict[AgentRole, str] = {
+        AgentRole.RESEARCHER: """You are a research specialist. Your job is to:
 - Search for information on the web
 - Read and analyze multiple sources
 - Extract key facts and insights
 - Provide comprehensive research summaries with citations
 - Identify knowledge gaps that need more research""",
-            
-            AgentRole.CODER: """You are a coding expert. Your job is to:
+        
+        AgentRole.CODER: """You are a coding expert. Your job is to:
 - Write clean, efficient Python code
 - Debug and fix code errors
 - Explain code functionality
 - Suggest optimizations and best practices
 - Generate code examples and solutions""",
-            
-            AgentRole.PLANNER: """You are a task planning specialist. Your job is to:
+        
+        AgentRole.PLANNER: """You are a task planning specialist. Your job is to:
 - Break down complex tasks into clear steps
 - Create actionable plans
 - Identify dependencies and prerequisites
 - Estimate time and resources needed
 - Prioritize tasks effectively""",
-            
-            AgentRole.CRITIC: """You are a quality critic. Your job is to:
+        
+        AgentRole.CRITIC: """You are a quality critic. Your job is to:
 - Review answers for accuracy and completeness
 - Identify potential errors or inconsistencies
 - Suggest improvements
 - Verify facts and claims
 - Ensure high-quality outputs""",
-            
-            AgentRole.EXECUTOR: """You are an execution specialist. Your job is to:
+        
+        AgentRole.EXECUTOR: """You are an execution specialist. Your job is to:
 - Coordinate between other agents
 - Execute plans step-by-step
 - Track progress and results
 - Handle errors and fallbacks
 - Deliver final results to the user"""
-        }
+    }
+    
+    # Prebuilt system message per role, shared by every agent instance
+    _SYSTEM_MESSAGES: Dict[AgentRole, Dict[str, str]] = {
+        role: {"role": "system", "content": prompt}
+        for role, prompt in _SYSTEM_PROMPTS.items()
+    }
+    
+    def __init__(self, role: AgentRole, router: AIRouter):
+        """Initialize agent.
+        
+        Args:
+            role: Agent role
+            router: AI router
+        """
+        self.role = role
+        self.router = router
     
     def think(self, task: str, context: Optional[Dict] = None) -> str:
         """Agent thinks about a task.
@@ -76,7 +86,7 @@ class Agent:
         """
         # Build messages with role-specific system prompt
         messages = [
-            {"role": "system", "content": self.system_prompts[self.role]},
+            self._SYSTEM_MESSAGES[self.role],
             {"role": "user", "content": task}
         ]
         
@@ -94,6 +104,8 @@ class Agent:
 class AgentSystem:
     """Multi-agent system coordinator."""
     
+    __slots__ = ("router", "agents")
+    
     def __init__(self, router: AIRouter):
         """Initialize agent system.
         
@@ -184,13 +196,18 @@ class AgentSystem:
             'final': None
         }
         
-        # Step 1: Create plan
-        if use_planner:
+        # Steps 1-2: Plan and research are independent, so run them together
+        if use_planner and use_researcher:
+            logger.info("Creating plan and conducting research...")
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                plan_future = executor.submit(self.create_plan, task)
+                research_future = executor.submit(self.research, task)
+                results['plan'] = plan_future.result()
+                results['research'] = research_future.result()
+        elif use_planner:
             logger.info("Creating plan...")
             results['plan'] = self.create_plan(task)
-        
-        # Step 2: Research if needed
-        if use_researcher:
+        elif use_researcher:
             logger.info("Conducting research...")
             results['research'] = self.research(task)
         
@@ -221,27 +238,20 @@ class AgentSystem:
         Returns:
             Final compiled answer
         """
-        output = []
+        sections = []
         
         if results.get('plan'):
-            output.append("## 📋 Plan")
-            output.append(results['plan'])
-            output.append("")
+            sections.append(f"## 📋 Plan\n{results['plan']}")
         
         if results.get('research'):
-            output.append("## 🔍 Research")
-            output.append(results['research'])
-            output.append("")
+            sections.append(f"## 🔍 Research\n{results['research']}")
         
-        output.append("## ✅ Answer")
-        output.append(results['answer'])
+        sections.append(f"## ✅ Answer\n{results['answer']}")
         
         if results.get('review'):
-            output.append("")
-            output.append("## 👁️ Quality Review")
-            output.append(results['review'])
+            sections.append(f"## 👁️ Quality Review\n{results['review']}")
         
-        return "\n".join(output)
+        return "\n\n".join(sections)
 
 
 # Global agent system (will be initialized later)
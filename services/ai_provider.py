@@ -1,7 +1,33 @@
 """AI Provider interface."""
 
 from abc import ABC, abstractmethod
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Iterator
+from core.logger import logger
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception as e:
+    logger.warning(f"tiktoken not available, using word-count token estimates: {e}")
+    _ENCODING = None
+
+
+@lru_cache(maxsize=4096)
+def count_tokens(text: str) -> int:
+    """Count tokens in text, memoized so history messages are encoded once.
+    
+    Args:
+        text: Input text
+        
+    Returns:
+        Token count (BPE when tiktoken is available, else an estimate)
+    """
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    
+    # Rough estimate: 1 token ≈ 0.75 words
+    return int(len(text.split()) / 0.75)
 
 
 class AIProvider(ABC):
@@ -19,6 +45,19 @@ class AIProvider(ABC):
         """
         pass
     
+    def chat_stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Send chat messages and yield the response as it is generated.
+        
+        Providers without native streaming yield the full response once.
+        
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            
+        Yields:
+            Response text chunks
+        """
+        yield self.chat(messages)
+    
     @abstractmethod
     def estimate_tokens(self, text: str) -> int:
         """Estimate token count for text.
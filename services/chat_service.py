@@ -1,10 +1,12 @@
 """Chat service with tool calling and memory."""
 
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterator, Tuple
 from datetime import datetime
-from core.database import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.orm import Session
 from core.logger import logger
 from models.chat import Conversation, Message
+from services.ai_provider import count_tokens
 from services.router import AIRouter
 from tools.tool_manager import ToolManager
 from tools.tool_registry import registry
@@ -14,21 +16,72 @@ from services.synthesis_service import synthesis_service
 import re
 
 
+# Statements of fact worth remembering, compiled once for every message
+_FACT_RES = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"(?:remember|note|important):\s*(.+)",
+        r"my\s+(?:name|email|phone|address)\s+is\s+(.+)",
+        r"I\s+(?:like|prefer|hate|love)\s+(.+)"
+    )
+]
+
+# Messages containing any of these are candidates for tool use
+_TOOL_KEYWORDS = (
+    'latest', 'current', 'recent', 'news', 'search',
+    'find', 'look up', 'who is', 'what is', 'when',
+    'read', 'visit', 'open'
+)
+_TOOL_KEYWORD_RE = re.compile("|".join(map(re.escape, _TOOL_KEYWORDS)), re.IGNORECASE)
+
+# Cheap pre-checks: a message can only match if it is long enough and
+# contains the first letter of some keyword
+_TOOL_MIN_LEN = min(map(len, _TOOL_KEYWORDS))
+_TOOL_FIRST_CHARS = frozenset(
+    c for keyword in _TOOL_KEYWORDS for c in (keyword[0], keyword[0].upper())
+)
+
+
 class ChatService:
     """Enhanced chat service with intelligence."""
     
-    def __init__(self, router: AIRouter):
-        """Initialize chat service."""
+    def __init__(self, router: AIRouter, db: Session):
+        """Initialize chat service.
+        
+        Args:
+            router: AI router
+            db: Database session; released by close() or on leaving a with block
+        """
         self.router = router
         self.tool_manager = ToolManager()
-        self.db = SessionLocal()
+        self.db = db
         self.current_conversation = None
+        self._history: List[Dict[str, str]] = []
+        self._history_tokens = 0
+        
+        # Built once so the prompt prefix stays identical across turns
+        self._system_message = {
+            "role": "system",
+            "content": f"""You are a helpful AI assistant with access to tools.
+
+{registry.format_tools_for_prompt()}
+
+When answering questions:
+1. Use information from web search results when provided
+2. Cite sources using [1], [2], [3] format
+3. Be comprehensive and accurate
+4. If information seems contradictory, mention it
+"""
+        }
+        self._system_tokens = count_tokens(self._system_message["content"])
+        
         self._init_conversation()
     
     def _init_conversation(self):
         """Initialize conversation."""
+        # Latest conversation via the primary key index (ids grow with created_at)
         conversation = self.db.query(Conversation).order_by(
-            Conversation.created_at.desc()
+            Conversation.id.desc()
         ).first()
         
         if not conversation:
@@ -38,30 +91,46 @@ class ChatService:
             self.db.refresh(conversation)
         
         self.current_conversation = conversation
+        self._load_history()
         logger.info(f"Using conversation: {conversation.id}")
     
+    def _load_history(self):
+        """Load the current conversation's history from the database.
+        
+        Only called on conversation switch; later turns are appended in memory.
+        """
+        rows = self.db.execute(
+            select(Message.role, Message.content)
+            .where(Message.conversation_id == self.current_conversation.id)
+            .order_by(Message.timestamp, Message.id)
+        )
+        self._history = [{"role": role, "content": content} for role, content in rows]
+        self._history_tokens = sum(count_tokens(msg["content"]) for msg in self._history)
+    
     def _should_use_tool(self, message: str) -> bool:
         """Determine if message requires tools."""
-        tool_keywords = [
-            'latest', 'current', 'recent', 'news', 'search',
-            'find', 'look up', 'who is', 'what is', 'when',
-            'read', 'visit', 'open'
-        ]
+        if len(message) < _TOOL_MIN_LEN or _TOOL_FIRST_CHARS.isdisjoint(message):
+            return False
         
-        message_lower = message.lower()
-        return any(keyword in message_lower for keyword in tool_keywords)
+        # One pass over the message instead of a substring scan per keyword
+        return _TOOL_KEYWORD_RE.search(message) is not None
     
-    def _build_context_with_memory(self, user_message: str) -> str:
+    def _build_context_with_memory(self, user_message: str, message_folded: str) -> str:
         """Enhance message with relevant memories.
         
         Args:
             user_message: User's message
+            message_folded: user_message.casefold()
             
         Returns:
             Enhanced message with memory context
         """
         # Search relevant memories
-        relevant_memories = memory_store.search_memories(user_message, limit=3)
+        relevant_memories = memory_store.search_memories(
+            user_message,
+            limit=3,
+            query_folded=message_folded
+        )
         
         if not relevant_memories:
             return user_message
@@ -85,39 +154,34 @@ class ChatService:
         facts = []
         
         # Simple extraction: look for statements of fact
-        fact_patterns = [
-            r"(?:remember|note|important):\s*(.+)",
-            r"my\s+(?:name|email|phone|address)\s+is\s+(.+)",
-            r"I\s+(?:like|prefer|hate|love)\s+(.+)"
-        ]
-        
         for msg in conversation:
             if msg['role'] == 'user':
                 content = msg['content']
-                for pattern in fact_patterns:
-                    matches = re.findall(pattern, content, re.IGNORECASE)
-                    facts.extend(matches)
+                for pattern in _FACT_RES:
+                    facts.extend(pattern.findall(content))
         
         return facts
     
-    def get_history(self) -> List[Dict[str, str]]:
-        """Get conversation history."""
-        messages = self.db.query(Message).filter(
-            Message.conversation_id == self.current_conversation.id
-        ).order_by(Message.timestamp).all()
-        
-        return [
-            {"role": msg.role, "content": msg.content}
-            for msg in messages
-        ]
+    def get_history(self, refresh: bool = False) -> List[Dict[str, str]]:
+        """Get conversation history.
+        
+        Args:
+            refresh: Reload from the database instead of using the cache
+            
+        Returns:
+            Cached message list (do not mutate)
+        """
+        if refresh:
+            self._load_history()
+        return self._history
     
-    def send_message(
+    def _prepare_turn(
         self,
         content: str,
-        use_tools: bool = True,
-        use_memory: bool = True
-    ) -> Tuple[str, str]:
-        """Send message with intelligent tool use and memory.
+        use_tools: bool,
+        use_memory: bool
+    ) -> Tuple[Message, List[Dict[str, str]], int]:
+        """Build the user message and provider payload for a turn.
         
         Args:
             content: User message
@@ -125,30 +189,33 @@ class ChatService:
             use_memory: Enable memory retrieval
             
         Returns:
-            Tuple of (response, provider_name)
+            Tuple of (unsaved user Message, messages to send, their token count)
         """
-        # Save user message
+        # User message is saved together with the reply
         user_msg = Message(
             conversation_id=self.current_conversation.id,
             role="user",
-            content=content
+            content=content,
+            timestamp=datetime.utcnow()
         )
-        self.db.add(user_msg)
-        self.db.commit()
+        
+        # Case-folded once and shared by the keyword checks below
+        content_folded = content.casefold()
         
         # Enhance with memory
         enhanced_content = content
         if use_memory:
-            enhanced_content = self._build_context_with_memory(content)
+            enhanced_content = self._build_context_with_memory(content, content_folded)
         
         # Check if tools needed
         tool_result = None
         if use_tools and self._should_use_tool(content):
-            suggested_tool = executor.should_use_tool(content, [])
+            suggested_tool = executor.should_use_tool(content, [], content_folded)
             
             if suggested_tool == "search_and_read":
                 logger.info("Auto-triggering search_and_read")
                 query = content
+                # search_and_read caches successful results itself
                 tool_result = self.tool_manager.smart_search(query, num_results=3)
                 
                 # Add tool result to context
@@ -159,54 +226,119 @@ class ChatService:
 
 Please provide a comprehensive answer with citations [1], [2], [3] etc."""
         
-        # Get conversation history
-        history = self.get_history()
-        history[-1]['content'] = enhanced_content
+        # System prompt first, then history and the new turn, in one list
+        history = [
+            self._system_message,
+            *self._history,
+            {"role": "user", "content": enhanced_content}
+        ]
         
-        # Add tool descriptions to system context
-        system_message = {
-            "role": "system",
-            "content": f"""You are a helpful AI assistant with access to tools.
-
-{registry.format_tools_for_prompt()}
-
-When answering questions:
-1. Use information from web search results when provided
-2. Cite sources using [1], [2], [3] format
-3. Be comprehensive and accurate
-4. If information seems contradictory, mention it
-"""
-        }
+        token_count = (
+            self._system_tokens
+            + self._history_tokens
+            + count_tokens(enhanced_content)
+        )
         
-        history = [system_message] + history
+        return user_msg, history, token_count
+    
+    def _finish_turn(self, user_msg: Message, response: str, provider: str):
+        """Remember facts and persist a completed turn.
         
-        # Get AI response
-        response, provider = self.router.chat(history)
-        
-        # Extract and save important facts to memory
-        facts = self._extract_important_facts(history)
-        for fact in facts:
-            memory_store.add_memory(
-                content=fact,
-                memory_type="fact",
-                tags=["conversation"],
-                metadata={"conversation_id": self.current_conversation.id}
-            )
-        
-        # Save assistant message
+        Args:
+            user_msg: Unsaved user Message from _prepare_turn
+            response: AI response
+            provider: Provider that produced the response
+        """
+        content = user_msg.content
+        
+        # Extract and save important facts to memory; earlier turns were
+        # already processed when they were sent
+        facts = self._extract_important_facts([{"role": "user", "content": content}])
+        memory_store.add_memories_bulk(
+            facts,
+            memory_type="fact",
+            tags=["conversation"],
+            metadata={"conversation_id": self.current_conversation.id}
+        )
+        
+        # Save both messages in a single commit
         ai_msg = Message(
             conversation_id=self.current_conversation.id,
             role="assistant",
             content=response,
             provider=provider
         )
-        self.db.add(ai_msg)
+        self.db.add_all([user_msg, ai_msg])
         
         self.current_conversation.updated_at = datetime.utcnow()
         self.db.commit()
         
+        self._history.append({"role": "user", "content": content})
+        self._history.append({"role": "assistant", "content": response})
+        self._history_tokens += count_tokens(content) + count_tokens(response)
+    
+    def send_message(
+        self,
+        content: str,
+        use_tools: bool = True,
+        use_memory: bool = True
+    ) -> Tuple[str, str]:
+        """Send message with intelligent tool use and memory.
+        
+        Args:
+            content: User message
+            use_tools: Enable automatic tool use
+            use_memory: Enable memory retrieval
+            
+        Returns:
+            Tuple of (response, provider_name)
+        """
+        user_msg, history, token_count = self._prepare_turn(content, use_tools, use_memory)
+        
+        # Get AI response
+        response, provider = self.router.chat(
+            history,
+            token_hint=token_count,
+            cache_prompt=content
+        )
+        
+        self._finish_turn(user_msg, response, provider)
         return response, provider
     
+    def stream_message(
+        self,
+        content: str,
+        use_tools: bool = True,
+        use_memory: bool = True
+    ) -> Tuple[Iterator[str], str]:
+        """Send message and stream the response as it is generated.
+        
+        The turn is saved once the returned iterator is exhausted.
+        
+        Args:
+            content: User message
+            use_tools: Enable automatic tool use
+            use_memory: Enable memory retrieval
+            
+        Returns:
+            Tuple of (response chunk iterator, provider_name)
+        """
+        user_msg, history, token_count = self._prepare_turn(content, use_tools, use_memory)
+        chunks, provider = self.router.chat_stream(
+            history,
+            token_hint=token_count,
+            cache_prompt=content
+        )
+        
+        def stream() -> Iterator[str]:
+            parts = []
+            for chunk in chunks:
+                parts.append(chunk)
+                yield chunk
+            self._finish_turn(user_msg, "".join(parts), provider)
+        
+        return stream(), provider
+    
     def clear_history(self):
         """Clear conversation."""
         conversation = Conversation(title="New Chat")
@@ -215,9 +347,16 @@ When answering questions:
         self.db.refresh(conversation)
         
         self.current_conversation = conversation
+        self._history = []
+        self._history_tokens = 0
         logger.info("Started new conversation")
     
-    def __del__(self):
-        """Cleanup."""
-        if hasattr(self, 'db'):
-            self.db.close()
+    def close(self):
+        """Close the database session."""
+        self.db.close()
+    
+    def __enter__(self) -> "ChatService":
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
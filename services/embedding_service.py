@@ -0,0 +1,47 @@
+"""Shared sentence embedding model."""
+
+from functools import lru_cache
+from typing import List, Optional
+import numpy as np
+from core.config import settings
+from core.logger import logger
+
+
+@lru_cache(maxsize=1)
+def get_encoder():
+    """Load the sentence-transformer model once.
+    
+    Returns:
+        SentenceTransformer model, or None if it is not available
+    """
+    try:
+        from sentence_transformers import SentenceTransformer
+        encoder = SentenceTransformer(settings.EMBEDDING_MODEL)
+        logger.info(f"Loaded embedding model: {settings.EMBEDDING_MODEL}")
+        return encoder
+    except Exception as e:
+        logger.warning(f"Embeddings not available: {e}")
+        return None
+
+
+def embed(texts: List[str]) -> Optional[np.ndarray]:
+    """Embed texts in one batch.
+    
+    Args:
+        texts: Texts to embed
+    
+    Returns:
+        Array of shape (len(texts), dim) with L2-normalized float32 rows,
+        or None if no encoder is available
+    """
+    encoder = get_encoder()
+    if encoder is None:
+        return None
+    
+    embeddings = encoder.encode(
+        texts,
+        batch_size=32,
+        normalize_embeddings=True,
+        convert_to_numpy=True
+    )
+    return embeddings.astype(np.float32, copy=False)
@@ -1,10 +1,18 @@
 """Google Gemini AI service."""
 
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Iterator
 import google.generativeai as genai
 from core.config import settings
 from core.logger import logger
-from services.ai_provider import AIProvider
+from services.ai_provider import AIProvider, count_tokens
+
+
+@lru_cache(maxsize=None)
+def _get_model(api_key: str, model_name: str) -> genai.GenerativeModel:
+    """Configure Gemini once and share the model client across services."""
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
 
 
 class GeminiService(AIProvider):
@@ -15,24 +23,27 @@ class GeminiService(AIProvider):
         if not settings.GEMINI_API_KEY:
             raise ValueError("GEMINI_API_KEY not found in environment")
         
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+        self.model = _get_model(settings.GEMINI_API_KEY, settings.GEMINI_MODEL)
         logger.info(f"Initialized Gemini service with model: {settings.GEMINI_MODEL}")
     
+    def _start_chat(self, messages: List[Dict[str, str]]):
+        """Start a Gemini chat session holding all but the last message."""
+        # Convert messages to Gemini format (all except last)
+        chat_history = [
+            {
+                "role": "user" if msg["role"] == "user" else "model",
+                "parts": [msg["content"]]
+            }
+            for msg in messages[:-1]
+        ]
+        
+        return self.model.start_chat(history=chat_history)
+    
     def chat(self, messages: List[Dict[str, str]]) -> str:
         """Send chat messages to Gemini and get response."""
         try:
-            # Convert messages to Gemini format
-            chat_history = []
-            for msg in messages[:-1]:  # All except last
-                role = "user" if msg["role"] == "user" else "model"
-                chat_history.append({
-                    "role": role,
-                    "parts": [msg["content"]]
-                })
-            
             # Start chat with history
-            chat = self.model.start_chat(history=chat_history)
+            chat = self._start_chat(messages)
             
             # Send last message
             response = chat.send_message(messages[-1]["content"])
@@ -43,10 +54,22 @@ class GeminiService(AIProvider):
             logger.error(f"Gemini API error: {str(e)}")
             raise
     
+    def chat_stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Stream a chat response from Gemini as it is generated."""
+        try:
+            chat = self._start_chat(messages)
+            response = chat.send_message(messages[-1]["content"], stream=True)
+            
+            for chunk in response:
+                yield chunk.text
+            
+        except Exception as e:
+            logger.error(f"Gemini API error: {str(e)}")
+            raise
+    
     def estimate_tokens(self, text: str) -> int:
-        """Estimate token count (rough approximation)."""
-        # Rough estimate: 1 token ≈ 0.75 words
-        return int(len(text.split()) / 0.75)
+        """Estimate token count."""
+        return count_tokens(text)
     
     @property
     def name(self) -> str:
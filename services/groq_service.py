@@ -1,10 +1,17 @@
 """Groq AI service."""
 
-from typing import List, Dict
+from functools import lru_cache
+from typing import List, Dict, Iterator
 from groq import Groq
 from core.config import settings
 from core.logger import logger
-from services.ai_provider import AIProvider
+from services.ai_provider import AIProvider, count_tokens
+
+
+@lru_cache(maxsize=None)
+def _get_client(api_key: str) -> Groq:
+    """Get a shared Groq client so its HTTP connection pool is reused."""
+    return Groq(api_key=api_key)
 
 
 class GroqService(AIProvider):
@@ -15,7 +22,7 @@ class GroqService(AIProvider):
         if not settings.GROQ_API_KEY:
             raise ValueError("GROQ_API_KEY not found in environment")
         
-        self.client = Groq(api_key=settings.GROQ_API_KEY)
+        self.client = _get_client(settings.GROQ_API_KEY)
         self.model = settings.GROQ_MODEL
         logger.info(f"Initialized Groq service with model: {self.model}")
     
@@ -35,10 +42,28 @@ class GroqService(AIProvider):
             logger.error(f"Groq API error: {str(e)}")
             raise
     
+    def chat_stream(self, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Stream a chat response from Groq as tokens arrive."""
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=2000,
+                stream=True,
+            )
+            
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            
+        except Exception as e:
+            logger.error(f"Groq API error: {str(e)}")
+            raise
+    
     def estimate_tokens(self, text: str) -> int:
-        """Estimate token count (rough approximation)."""
-        # Rough estimate: 1 token ≈ 0.75 words
-        return int(len(text.split()) / 0.75)
+        """Estimate token count."""
+        return count_tokens(text)
     
     @property
     def name(self) -> str:
@@ -1,50 +1,118 @@
 """Long-term memory system using vector database."""
 
-import json
+import atexit
+import heapq
 import os
+from collections import Counter
 from datetime import datetime
 from typing import List, Dict, Optional
 from pathlib import Path
+import numpy as np
+import orjson
 from core.logger import logger
 from core.config import settings
+from services.embedding_service import embed
+
+# Access-stat updates are written to disk once this many have accumulated
+_FLUSH_EVERY = 20
+
+# Minimum cosine similarity for a semantic search result
+_MIN_SIMILARITY = 0.35
 
 
 class MemoryStore:
     """Simple file-based memory store (will upgrade to vector DB later)."""
     
-    def __init__(self, memory_file: str = "data/memory.json"):
+    def __init__(self, memory_file: str = "data/memory.jsonl"):
         """Initialize memory store.
         
         Args:
-            memory_file: Path to memory file
+            memory_file: Path to memory file (JSON Lines, one memory per line)
         """
         self.memory_file = Path(memory_file)
         self.memory_file.parent.mkdir(exist_ok=True)
         self.memories: List[Dict] = []
+        self._lower_contents: List[str] = []
+        self._embeddings: Optional[np.ndarray] = None
+        self._pending_accesses = 0
+        # Set when the file could not be read cleanly; rewriting it would
+        # then drop the memories that were skipped
+        self._load_failed = False
         self._load()
+        atexit.register(self.flush)
     
     def _load(self):
         """Load memories from file."""
+        legacy_file = self.memory_file.with_suffix(".json")
+        
         if self.memory_file.exists():
+            self.memories = []
             try:
-                with open(self.memory_file, 'r', encoding='utf-8') as f:
-                    self.memories = json.load(f)
+                with open(self.memory_file, 'rb') as f:
+                    for line_number, line in enumerate(f, 1):
+                        if not line.strip():
+                            continue
+                        try:
+                            self.memories.append(orjson.loads(line))
+                        except orjson.JSONDecodeError as e:
+                            # Keep the rest of the file rather than discarding it all
+                            logger.warning(f"Skipping unreadable memory on line {line_number}: {e}")
+                            self._load_failed = True
                 logger.info(f"Loaded {len(self.memories)} memories")
             except Exception as e:
                 logger.error(f"Error loading memories: {e}")
                 self.memories = []
+                self._load_failed = True
+        elif legacy_file.exists():
+            # Migrate the old single-document format
+            try:
+                with open(legacy_file, 'rb') as f:
+                    self.memories = orjson.loads(f.read())
+                self._save()
+                logger.info(f"Migrated {len(self.memories)} memories from {legacy_file}")
+            except Exception as e:
+                logger.error(f"Error loading memories: {e}")
+                self.memories = []
         else:
             self.memories = []
+        self._reindex()
+    
+    def _reindex(self):
+        """Rebuild search indexes after memories change."""
+        self._lower_contents = [m["content"].casefold() for m in self.memories]
+        self._embeddings = None
     
     def _save(self):
-        """Save memories to file."""
+        """Rewrite the memory file, compacting updates and deletions."""
+        if self._load_failed:
+            logger.warning(
+                f"Not rewriting {self.memory_file}: it did not load cleanly "
+                "and skipped memories would be lost"
+            )
+            self._pending_accesses = 0
+            return
+        
         try:
-            with open(self.memory_file, 'w', encoding='utf-8') as f:
-                json.dump(self.memories, f, indent=2, ensure_ascii=False)
+            with open(self.memory_file, 'wb') as f:
+                f.writelines(orjson.dumps(memory) + b"\n" for memory in self.memories)
+            self._pending_accesses = 0
             logger.info(f"Saved {len(self.memories)} memories")
         except Exception as e:
             logger.error(f"Error saving memories: {e}")
     
+    def _append(self, memories: List[Dict]):
+        """Append new memories to the file without rewriting it."""
+        try:
+            with open(self.memory_file, 'ab') as f:
+                f.writelines(orjson.dumps(memory) + b"\n" for memory in memories)
+        except Exception as e:
+            logger.error(f"Error saving memories: {e}")
+    
+    def flush(self):
+        """Write pending access-stat updates to disk."""
+        if self._pending_accesses:
+            self._save()
+    
     def add_memory(
         self,
         content: str,
@@ -63,65 +131,168 @@ class MemoryStore:
         Returns:
             The created memory
         """
-        memory = {
-            "id": len(self.memories) + 1,
-            "content": content,
-            "type": memory_type,
-            "tags": tags or [],
-            "metadata": metadata or {},
-            "created_at": datetime.utcnow().isoformat(),
-            "accessed_count": 0,
-            "last_accessed": None
-        }
+        return self.add_memories_bulk([content], memory_type, tags, metadata)[0]
+    
+    def add_memories_bulk(
+        self,
+        contents: List[str],
+        memory_type: str = "fact",
+        tags: List[str] = None,
+        metadata: Dict = None
+    ) -> List[Dict]:
+        """Add several memories with a single write.
+        
+        Args:
+            contents: Memory contents
+            memory_type: Type (fact, preference, conversation, etc.)
+            tags: List of tags
+            metadata: Additional metadata
+            
+        Returns:
+            The created memories
+        """
+        if not contents:
+            return []
+        
+        created_at = datetime.utcnow().isoformat()
+        memories = [
+            {
+                "id": len(self.memories) + i + 1,
+                "content": content,
+                "type": memory_type,
+                "tags": list(tags or []),
+                "metadata": dict(metadata or {}),
+                "created_at": created_at,
+                "accessed_count": 0,
+                "last_accessed": None
+            }
+            for i, content in enumerate(contents)
+        ]
+        
+        lower_contents = [content.casefold() for content in contents]
+        
+        # Extend the embedding matrix with one batched encode of the new
+        # facts rather than invalidating it
+        if self._embeddings is not None:
+            new_embeddings = embed(contents)
+            self._embeddings = (
+                None if new_embeddings is None
+                else np.vstack([self._embeddings, new_embeddings])
+            )
+        
+        self.memories.extend(memories)
+        self._lower_contents.extend(lower_contents)
+        self._append(memories)
         
-        self.memories.append(memory)
-        self._save()
-        logger.info(f"Added memory: {content[:50]}...")
+        for content in contents:
+            logger.info(f"Added memory: {content[:50]}...")
         
-        return memory
+        return memories
     
     def search_memories(
         self,
         query: str,
         memory_type: Optional[str] = None,
         tags: Optional[List[str]] = None,
-        limit: int = 5
+        limit: int = 5,
+        semantic: bool = False,
+        query_folded: Optional[str] = None
     ) -> List[Dict]:
-        """Search memories (simple keyword search for now).
+        """Search memories.
         
         Args:
             query: Search query
             memory_type: Filter by type
             tags: Filter by tags
             limit: Maximum results
+            semantic: Rank by embedding similarity instead of keyword match
+            query_folded: query.casefold(), if the caller already has it
             
         Returns:
             List of matching memories
         """
-        query_lower = query.lower()
-        results = []
+        if not self.memories:
+            return []
         
-        for memory in self.memories:
-            # Type filter
-            if memory_type and memory["type"] != memory_type:
-                continue
+        # Filters
+        mask = np.ones(len(self.memories), dtype=bool)
+        if memory_type or tags:
+            mask &= np.fromiter(
+                (
+                    (not memory_type or m["type"] == memory_type)
+                    and (not tags or any(tag in m["tags"] for tag in tags))
+                    for m in self.memories
+                ),
+                dtype=bool,
+                count=len(self.memories)
+            )
+        
+        results = None
+        if semantic:
+            results = self._semantic_search(query, mask, limit)
+        
+        # Keyword search (also the fallback when embeddings are unavailable)
+        if results is None:
+            if query_folded is None:
+                query_folded = query.casefold()
+            mask &= np.fromiter(
+                (query_folded in content for content in self._lower_contents),
+                dtype=bool,
+                count=len(self._lower_contents)
+            )
+            results = [self.memories[i] for i in np.flatnonzero(mask)]
             
-            # Tag filter
-            if tags and not any(tag in memory["tags"] for tag in tags):
-                continue
+            # Sort by relevance (accessed count for now)
+            results.sort(key=lambda x: x["accessed_count"], reverse=True)
+            results = results[:limit]
+        
+        # Update access stats; written out in batches rather than per search
+        now = datetime.utcnow().isoformat()
+        for memory in results:
+            memory["accessed_count"] += 1
+            memory["last_accessed"] = now
+        
+        self._pending_accesses += len(results)
+        if self._pending_accesses >= _FLUSH_EVERY:
+            self._save()
+        
+        return results
+    
+    def _semantic_search(
+        self,
+        query: str,
+        mask: np.ndarray,
+        limit: int
+    ) -> Optional[List[Dict]]:
+        """Rank memories by cosine similarity to the query.
+        
+        Args:
+            query: Search query
+            mask: Memories allowed by the filters
+            limit: Maximum results
             
-            # Keyword search
-            if query_lower in memory["content"].lower():
-                # Update access stats
-                memory["accessed_count"] += 1
-                memory["last_accessed"] = datetime.utcnow().isoformat()
-                results.append(memory)
-        
-        # Sort by relevance (accessed count for now)
-        results.sort(key=lambda x: x["accessed_count"], reverse=True)
-        
-        self._save()
-        return results[:limit]
+        Returns:
+            List of matching memories, or None if embeddings are unavailable
+        """
+        if self._embeddings is None:
+            self._embeddings = embed([m["content"] for m in self.memories])
+        query_embedding = embed([query])
+        if self._embeddings is None or query_embedding is None:
+            return None
+        
+        similarities = self._embeddings @ query_embedding[0]
+        similarities[~mask] = -np.inf
+        
+        k = min(limit, len(similarities))
+        if k <= 0:
+            return []
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[np.argsort(-similarities[top])]
+        
+        return [
+            self.memories[i] for i in top
+            if similarities[i] >= _MIN_SIMILARITY
+        ]
     
     def get_recent_memories(self, limit: int = 10) -> List[Dict]:
         """Get most recent memories.
@@ -132,12 +303,11 @@ class MemoryStore:
         Returns:
             List of recent memories
         """
-        sorted_memories = sorted(
-            self.memories,
-            key=lambda x: x["created_at"],
-            reverse=True
-        )
-        return sorted_memories[:limit]
+        if limit <= 0:
+            return []
+        
+        # Memories are appended chronologically, newest last
+        return self.memories[:-limit - 1:-1]
     
     def delete_memory(self, memory_id: int) -> bool:
         """Delete a memory.
@@ -152,6 +322,7 @@ class MemoryStore:
         self.memories = [m for m in self.memories if m["id"] != memory_id]
         
         if len(self.memories) < original_count:
+            self._reindex()
             self._save()
             logger.info(f"Deleted memory {memory_id}")
             return True
@@ -164,21 +335,15 @@ class MemoryStore:
         Returns:
             Statistics dict
         """
-        types = {}
-        for memory in self.memories:
-            memory_type = memory["type"]
-            types[memory_type] = types.get(memory_type, 0) + 1
-        
         return {
             "total": len(self.memories),
-            "by_type": types,
-            "most_accessed": sorted(
+            "by_type": dict(Counter(m["type"] for m in self.memories)),
+            "most_accessed": heapq.nlargest(
+                5,
                 self.memories,
-                key=lambda x: x["accessed_count"],
-                reverse=True
-            )[:5]
+                key=lambda x: x["accessed_count"]
+            )
         }
 
-
 # Global memory store
 memory_store = MemoryStore()
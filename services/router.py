@@ -1,10 +1,17 @@
 """Intelligent AI provider routing."""
 
-from typing import List, Dict, Tuple
+import concurrent.futures
+import itertools
+from typing import List, Dict, Iterator, Optional, Tuple
 from core.config import settings
 from core.logger import logger
+from services.ai_provider import AIProvider
 from services.groq_service import GroqService
 from services.gemini_service import GeminiService
+from services.semantic_cache import SemanticCache
+
+# Marks a provider whose construction failed, so it is not retried every call
+_UNAVAILABLE = object()
 
 
 class AIRouter:
@@ -12,23 +19,54 @@ class AIRouter:
     
     def __init__(self):
         """Initialize router with providers."""
-        self.providers = {}
+        self._provider_factories = {"groq": GroqService, "gemini": GeminiService}
+        self._providers: Dict[str, object] = {}
         self.current_provider = settings.DEFAULT_PROVIDER
         
-        # Initialize Groq (required)
+        # Initialize Groq (required); Gemini (optional) is built on first use
         try:
-            self.providers["groq"] = GroqService()
+            self._providers["groq"] = GroqService()
             logger.info("Groq provider initialized")
         except Exception as e:
             logger.error(f"Failed to initialize Groq: {e}")
             raise
         
-        # Initialize Gemini (optional)
-        try:
-            self.providers["gemini"] = GeminiService()
-            logger.info("Gemini provider initialized")
-        except Exception as e:
-            logger.warning(f"Gemini not available: {e}")
+        # Semantic cache for repeated or paraphrased prompts
+        self.cache = None
+        if settings.SEMANTIC_CACHE_ENABLED:
+            self.cache = SemanticCache(
+                threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+                max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES
+            )
+        
+        # Threads for racing providers against each other
+        self._pool = None
+        if settings.SPECULATIVE_DISPATCH and settings.GEMINI_API_KEY:
+            self._pool = concurrent.futures.ThreadPoolExecutor(
+                max_workers=len(self._provider_factories),
+                thread_name_prefix="provider"
+            )
+    
+    def _get(self, name: str) -> Optional[AIProvider]:
+        """Get a provider, constructing it on first use.
+        
+        Args:
+            name: Provider name
+            
+        Returns:
+            Provider instance, or None if it is not available
+        """
+        provider = self._providers.get(name)
+        if provider is None:
+            try:
+                provider = self._provider_factories[name]()
+                logger.info(f"{name.capitalize()} provider initialized")
+            except Exception as e:
+                logger.warning(f"{name.capitalize()} not available: {e}")
+                provider = _UNAVAILABLE
+            self._providers[name] = provider
+        
+        return None if provider is _UNAVAILABLE else provider
     
     def set_provider(self, provider: str):
         """Manually set provider.
@@ -39,17 +77,50 @@ class AIRouter:
         if provider not in ["groq", "gemini", "auto"]:
             raise ValueError(f"Invalid provider: {provider}")
         
-        if provider != "auto" and provider not in self.providers:
+        if provider != "auto" and self._get(provider) is None:
             raise ValueError(f"Provider {provider} not available")
         
         self.current_provider = provider
         logger.info(f"Provider set to: {provider}")
     
-    def select_provider(self, messages: List[Dict[str, str]]) -> str:
+    def _estimate_tokens(
+        self,
+        messages: List[Dict[str, str]],
+        token_hint: Optional[int] = None
+    ) -> int:
+        """Estimate total tokens per message; counts for earlier turns are cached."""
+        if token_hint is not None:
+            return token_hint
+        groq = self._get("groq")
+        return sum(groq.estimate_tokens(msg["content"]) for msg in messages)
+    
+    def _should_speculate(
+        self,
+        messages: List[Dict[str, str]],
+        token_hint: Optional[int] = None
+    ) -> bool:
+        """Whether a request is close enough to the routing threshold to race.
+        
+        Far from the threshold select_provider's choice is clear, and racing
+        would only double the API spend.
+        """
+        if not self._pool or self.current_provider != "auto":
+            return False
+        
+        threshold = settings.ROUTING_TOKEN_THRESHOLD
+        estimated_tokens = self._estimate_tokens(messages, token_hint)
+        return abs(estimated_tokens - threshold) <= threshold * settings.SPECULATIVE_BAND
+    
+    def select_provider(
+        self,
+        messages: List[Dict[str, str]],
+        token_hint: Optional[int] = None
+    ) -> str:
         """Intelligently select provider based on task.
         
         Args:
             messages: Chat messages
+            token_hint: Token count of messages, if the caller tracks it
             
         Returns:
             Provider name ('groq' or 'gemini')
@@ -58,14 +129,12 @@ class AIRouter:
         if self.current_provider != "auto":
             return self.current_provider
         
-        # Estimate total tokens
-        total_text = " ".join([msg["content"] for msg in messages])
-        estimated_tokens = self.providers["groq"].estimate_tokens(total_text)
+        estimated_tokens = self._estimate_tokens(messages, token_hint)
         
         # Route based on token count
         if estimated_tokens > settings.ROUTING_TOKEN_THRESHOLD:
             # Use Gemini for large context
-            if "gemini" in self.providers:
+            if self._get("gemini"):
                 logger.info(f"Routing to Gemini (tokens: {estimated_tokens})")
                 return "gemini"
         
@@ -73,17 +142,114 @@ class AIRouter:
         logger.info(f"Routing to Groq (tokens: {estimated_tokens})")
         return "groq"
     
-    def chat(self, messages: List[Dict[str, str]]) -> Tuple[str, str]:
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        token_hint: Optional[int] = None,
+        cache_prompt: Optional[str] = None
+    ) -> Tuple[str, str]:
         """Send chat messages using selected provider.
         
         Args:
             messages: Chat messages
+            token_hint: Token count of messages, if the caller tracks it
+            cache_prompt: Text the semantic cache matches on instead of the
+                last message, e.g. the user's words without added context
             
         Returns:
-            Tuple of (response, provider_name)
+            Tuple of (response, provider_name); provider_name is "cache"
+            when the response was served from the semantic cache
+        """
+        if self.cache:
+            cached = self.cache.get(messages, cache_prompt)
+            if cached:
+                return cached[0], "cache"
+        
+        if self._should_speculate(messages, token_hint):
+            response, provider_name = self.chat_speculative(messages)
+        else:
+            response, provider_name = self._chat_with_fallback(messages, token_hint)
+        
+        if self.cache:
+            self.cache.put(messages, response, provider_name, cache_prompt)
+        
+        return response, provider_name
+    
+    def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        token_hint: Optional[int] = None,
+        cache_prompt: Optional[str] = None
+    ) -> Tuple[Iterator[str], str]:
+        """Stream chat messages using selected provider.
+        
+        The provider request is started before returning, so connection
+        errors still fall back to the other provider.
+        
+        Args:
+            messages: Chat messages
+            token_hint: Token count of messages, if the caller tracks it
+            cache_prompt: Text the semantic cache matches on instead of the
+                last message
+            
+        Returns:
+            Tuple of (response chunk iterator, provider_name); a cache hit
+            yields the whole response as one chunk
         """
-        provider_name = self.select_provider(messages)
-        provider = self.providers[provider_name]
+        if self.cache:
+            cached = self.cache.get(messages, cache_prompt)
+            if cached:
+                return iter([cached[0]]), "cache"
+        
+        provider_name = self.select_provider(messages, token_hint)
+        
+        try:
+            chunks = self._open_stream(self._get(provider_name), messages)
+        except Exception as e:
+            logger.error(f"Error with {provider_name}: {e}")
+            
+            # Fallback to other provider
+            fallback = "gemini" if provider_name == "groq" else "groq"
+            fallback_provider = self._get(fallback)
+            if not fallback_provider:
+                raise
+            
+            logger.info(f"Falling back to {fallback}")
+            chunks = self._open_stream(fallback_provider, messages)
+            provider_name = fallback
+        
+        return self._cache_stream(messages, chunks, provider_name, cache_prompt), provider_name
+    
+    def _open_stream(self, provider: AIProvider, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """Start a provider stream and wait for its first chunk."""
+        stream = provider.chat_stream(messages)
+        first = next(stream, "")
+        return itertools.chain([first], stream)
+    
+    def _cache_stream(
+        self,
+        messages: List[Dict[str, str]],
+        chunks: Iterator[str],
+        provider_name: str,
+        cache_prompt: Optional[str] = None
+    ) -> Iterator[str]:
+        """Pass chunks through, caching the full response once complete."""
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        
+        if self.cache:
+            self.cache.put(messages, "".join(parts), provider_name, cache_prompt)
+    
+    def _chat_with_fallback(
+        self,
+        messages: List[Dict[str, str]],
+        token_hint: Optional[int] = None
+    ) -> Tuple[str, str]:
+        """Call the selected provider, falling back to the other on error."""
+        provider_name = self.select_provider(messages, token_hint)
+        provider = self._get(provider_name)
         
         try:
             response = provider.chat(messages)
@@ -93,9 +259,47 @@ class AIRouter:
             
             # Fallback to other provider
             fallback = "gemini" if provider_name == "groq" else "groq"
-            if fallback in self.providers:
+            fallback_provider = self._get(fallback)
+            if fallback_provider:
                 logger.info(f"Falling back to {fallback}")
-                response = self.providers[fallback].chat(messages)
+                response = fallback_provider.chat(messages)
                 return response, fallback
             
-            raise
\ No newline at end of file
+            raise
+    
+    def chat_speculative(self, messages: List[Dict[str, str]]) -> Tuple[str, str]:
+        """Send messages to every provider at once and use the first answer.
+        
+        A provider that fails is simply outrun by the other, so there is no
+        serial fallback round-trip. chat() only races requests near the
+        routing threshold; streamed responses always use select_provider.
+        
+        Args:
+            messages: Chat messages
+            
+        Returns:
+            Tuple of (response, provider_name)
+        """
+        futures = {
+            self._pool.submit(provider.chat, messages): name
+            for name in self._provider_factories
+            if (provider := self._get(name))
+        }
+        
+        error = None
+        for future in concurrent.futures.as_completed(futures):
+            name = futures[future]
+            try:
+                response = future.result()
+            except Exception as e:
+                logger.error(f"Error with {name}: {e}")
+                error = e
+                continue
+            
+            # Requests already in flight cannot be aborted; their results are dropped
+            for pending in futures:
+                pending.cancel()
+            logger.info(f"Speculative dispatch won by {name}")
+            return response, name
+        
+        raise error
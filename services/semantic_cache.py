@@ -0,0 +1,164 @@
+"""Semantic cache for AI responses."""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple
+import numpy as np
+from core.logger import logger
+from services.embedding_service import embed
+
+
+@lru_cache(maxsize=256)
+def _embed_prompt(prompt: str) -> Optional[np.ndarray]:
+    """Embed a single prompt (memoized so lookup and store share it)."""
+    embeddings = embed([prompt])
+    return None if embeddings is None else embeddings[0]
+
+
+class _Partition:
+    """Cached entries that share the same context (system prompt and history)."""
+    
+    __slots__ = ("embeddings", "entries")
+    
+    def __init__(self, embedding: np.ndarray, entry: Tuple[str, str, str]):
+        self.embeddings = embedding[np.newaxis, :]
+        self.entries = [entry]
+
+
+class SemanticCache:
+    """Return stored responses for prompts that mean the same thing."""
+    
+    def __init__(self, threshold: float = 0.87, max_entries: int = 1000, max_scopes: int = 256):
+        """Initialize cache.
+        
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Maximum entries kept per context
+            max_scopes: Maximum contexts kept; the least recently used is dropped
+        """
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.max_scopes = max_scopes
+        # One context per system prompt and preceding answer, so contexts are LRU-bounded
+        self._partitions: "OrderedDict[str, _Partition]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _key(
+        self,
+        messages: List[Dict[str, str]],
+        prompt: Optional[str] = None
+    ) -> Optional[Tuple[str, str]]:
+        """Get (scope, prompt) for messages, or None if not cacheable.
+        
+        The scope is a digest of the system prompt and the assistant turn
+        the prompt replies to, so answers are only shared between callers
+        with the same instructions (e.g. agent roles never share answers)
+        and a follow-up like "continue" only matches one that followed the
+        same answer. Older history does not enter the scope, so a repeated
+        question still hits as the conversation grows.
+        
+        Args:
+            messages: Chat messages
+            prompt: Text to match on instead of the last message, e.g. the
+                user's own words before context was added to them
+        """
+        if not messages or messages[-1]["role"] != "user":
+            return None
+        
+        context = [message for message in messages[:-1] if message["role"] == "system"]
+        previous = messages[-2] if len(messages) > 1 else None
+        if previous is not None and previous["role"] == "assistant":
+            context.append(previous)
+        
+        digest = hashlib.blake2b(digest_size=16)
+        for message in context:
+            digest.update(message["role"].encode())
+            digest.update(b"\0")
+            digest.update(message["content"].encode())
+            digest.update(b"\0")
+        return digest.hexdigest(), messages[-1]["content"] if prompt is None else prompt
+    
+    def get(
+        self,
+        messages: List[Dict[str, str]],
+        prompt: Optional[str] = None
+    ) -> Optional[Tuple[str, str]]:
+        """Look up a response for a similar prompt.
+        
+        Args:
+            messages: Chat messages
+            prompt: Text to match on instead of the last message
+        
+        Returns:
+            Tuple of (response, original_provider), or None on a miss
+        """
+        key = self._key(messages, prompt)
+        if key is None:
+            return None
+        scope, prompt = key
+        
+        query = _embed_prompt(prompt)
+        if query is None:
+            return None
+        
+        with self._lock:
+            partition = self._partitions.get(scope)
+            if partition is None:
+                return None
+            
+            # One matrix-vector product scores every cached prompt
+            similarities = partition.embeddings @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+            
+            self._partitions.move_to_end(scope)
+            _, response, provider = partition.entries[best]
+            logger.info(f"Semantic cache hit (similarity: {similarities[best]:.2f})")
+            return response, provider
+    
+    def put(
+        self,
+        messages: List[Dict[str, str]],
+        response: str,
+        provider: str,
+        prompt: Optional[str] = None
+    ):
+        """Store a response.
+        
+        Args:
+            messages: Chat messages the response answers
+            response: AI response
+            provider: Provider that produced it
+            prompt: Text to match on instead of the last message
+        """
+        key = self._key(messages, prompt)
+        if key is None:
+            return
+        scope, prompt = key
+        
+        embedding = _embed_prompt(prompt)
+        if embedding is None:
+            return
+        
+        with self._lock:
+            entry = (prompt, response, provider)
+            partition = self._partitions.get(scope)
+            if partition is None:
+                self._partitions[scope] = _Partition(embedding, entry)
+                while len(self._partitions) > self.max_scopes:
+                    self._partitions.popitem(last=False)
+                return
+            
+            self._partitions.move_to_end(scope)
+            
+            partition.embeddings = np.vstack([partition.embeddings, embedding])
+            partition.entries.append(entry)
+            
+            # Drop the oldest entries once full
+            overflow = len(partition.entries) - self.max_entries
+            if overflow > 0:
+                partition.embeddings = partition.embeddings[overflow:]
+                del partition.entries[:overflow]
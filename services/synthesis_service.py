@@ -1,8 +1,18 @@
 """Multi-source synthesis with citations."""
 
+import string
+from collections import Counter
 from typing import List, Dict, Tuple
 from core.logger import logger
 
+# Strips punctuation while tokenizing facts
+_STRIP_PUNCT = str.maketrans("", "", string.punctuation)
+
+
+def _tokenize(text: str) -> List[str]:
+    """Lowercase, strip punctuation and split text into words."""
+    return text.lower().translate(_STRIP_PUNCT).split()
+
 
 class SynthesisService:
     """Synthesize information from multiple sources."""
@@ -21,7 +31,7 @@ class SynthesisService:
         for i, page in enumerate(pages, 1):
             # Simple fact extraction (split by sentences)
             content = page.get('content', '')
-            sentences = content.split('.')
+            sentences = content.split('.', 5)
             
             # Take first 3-5 substantial sentences as facts
             for sentence in sentences[:5]:
@@ -29,6 +39,7 @@ class SynthesisService:
                 if len(sentence) > 50:  # Substantial sentence
                     facts.append({
                         'text': sentence,
+                        'tokens': _tokenize(sentence),
                         'source': page.get('url', 'Unknown'),
                         'source_title': page.get('title', 'Unknown'),
                         'source_number': i
@@ -87,22 +98,17 @@ class SynthesisService:
         Returns:
             Comparison summary
         """
-        # Simple comparison: find common keywords
-        all_words = []
+        # Simple comparison: find common keywords, reusing extraction tokens
+        word_count = Counter()
         for fact in facts:
-            words = fact['text'].lower().split()
-            all_words.extend([w for w in words if len(w) > 4])
-        
-        # Count word frequency
-        word_count = {}
-        for word in all_words:
-            word_count[word] = word_count.get(word, 0) + 1
+            tokens = fact.get('tokens') or _tokenize(fact['text'])
+            word_count.update(w for w in tokens if len(w) > 4)
         
         # Common themes (words mentioned multiple times)
         common_themes = [
-            word for word, count in word_count.items()
+            word for word, count in word_count.most_common(10)
             if count >= 2
-        ][:10]
+        ]
         
         return {
             'total_sources': len(set(f['source'] for f in facts)),
@@ -2,17 +2,52 @@
 
 import json
 import re
-from typing import Dict, List, Any, Optional, Tuple
+import reprlib
+from collections import deque
+from typing import Deque, Dict, List, Any, Optional, Tuple
 from core.logger import logger
 from tools.tool_registry import registry
 
+# TOOL_CALL: tool_name(param1="value1", param2="value2")
+_TOOL_CALL_RE = re.compile(r'TOOL_CALL:\s*(\w+)\((.*?)\)', re.IGNORECASE)
+_PARAM_RE = re.compile(r'(\w+)=(["\'])(.*?)\2')
+
+# Bounded repr for non-string results, so large containers are never
+# stringified in full just to keep a short snippet
+_SNIPPET_REPR = reprlib.Repr()
+_SNIPPET_REPR.maxstring = 200
+_SNIPPET_REPR.maxother = 200
+
+# Keywords that suggest tool usage, in priority order
+_TOOL_TRIGGERS = {
+    "search_and_read": [
+        "latest", "current", "recent", "news", "today",
+        "search for", "find information", "what's happening",
+        "who is", "what is", "when did"
+    ],
+    "web_search": [
+        "quick search", "find links", "search"
+    ],
+    "read_webpage": [
+        "read this url", "open", "visit"
+    ]
+}
+
+# One compiled alternation per tool. A single combined pattern would return
+# the leftmost keyword rather than the highest-priority tool.
+_TRIGGER_RES = [
+    (tool_name, re.compile("|".join(map(re.escape, keywords))))
+    for tool_name, keywords in _TOOL_TRIGGERS.items()
+]
+
 
 class ToolExecutor:
     """Executes tools based on AI decisions."""
     
     def __init__(self):
         """Initialize executor."""
-        self.execution_history: List[Dict] = []
+        # Most recent tool calls only; older entries drop off automatically
+        self.execution_history: Deque[Dict] = deque(maxlen=200)
     
     def parse_tool_call(self, text: str) -> Optional[Dict[str, Any]]:
         """Parse tool call from AI response.
@@ -27,8 +62,7 @@ class ToolExecutor:
             Dict with tool_name and parameters, or None
         """
         # Look for TOOL_CALL marker
-        pattern = r'TOOL_CALL:\s*(\w+)\((.*?)\)'
-        match = re.search(pattern, text, re.IGNORECASE)
+        match = _TOOL_CALL_RE.search(text)
         
         if not match:
             return None
@@ -40,8 +74,7 @@ class ToolExecutor:
         parameters = {}
         if params_str.strip():
             # Simple parameter parsing
-            param_pattern = r'(\w+)=(["\'])(.*?)\2'
-            for param_match in re.finditer(param_pattern, params_str):
+            for param_match in _PARAM_RE.finditer(params_str):
                 param_name = param_match.group(1)
                 param_value = param_match.group(3)
                 parameters[param_name] = param_value
@@ -71,11 +104,15 @@ class ToolExecutor:
                 **tool_call["parameters"]
             )
             
-            # Log execution
+            # Log execution (first 200 chars, without stringifying it all)
+            if isinstance(result, str):
+                snippet = result[:200]
+            else:
+                snippet = _SNIPPET_REPR.repr(result)[:200]
             self.execution_history.append({
                 "tool": tool_call["tool_name"],
                 "parameters": tool_call["parameters"],
-                "result": str(result)[:200]  # First 200 chars
+                "result": snippet
             })
             
             return result, True
@@ -84,35 +121,28 @@ class ToolExecutor:
             logger.error(f"Tool execution failed: {e}")
             return f"Error: {str(e)}", False
     
-    def should_use_tool(self, user_message: str, conversation_history: List[Dict]) -> Optional[str]:
+    def should_use_tool(
+        self,
+        user_message: str,
+        conversation_history: List[Dict],
+        message_folded: Optional[str] = None
+    ) -> Optional[str]:
         """Determine if a tool should be used.
         
         Args:
             user_message: User's message
             conversation_history: Chat history
+            message_folded: user_message.casefold(), if the caller already has it
             
         Returns:
             Tool suggestion or None
         """
-        # Keywords that suggest tool usage
-        tool_triggers = {
-            "search_and_read": [
-                "latest", "current", "recent", "news", "today",
-                "search for", "find information", "what's happening",
-                "who is", "what is", "when did"
-            ],
-            "web_search": [
-                "quick search", "find links", "search"
-            ],
-            "read_webpage": [
-                "read this url", "open", "visit"
-            ]
-        }
-        
-        message_lower = user_message.lower()
+        if message_folded is None:
+            message_folded = user_message.casefold()
         
-        for tool_name, keywords in tool_triggers.items():
-            if any(keyword in message_lower for keyword in keywords):
+        # First tool, in priority order, with a keyword in the message
+        for tool_name, pattern in _TRIGGER_RES:
+            if pattern.search(message_folded):
                 return tool_name
         
         return None
@@ -1,10 +1,19 @@
 """Tools for the AI assistant."""
 
-from tools.web_search import search_web, format_search_results
-from tools.web_navigator import scrape_webpage
-
-__all__ = [
-    'search_web',
-    'format_search_results',
-    'scrape_webpage',
-]
+import importlib
+
+# Exported name -> defining module; imported on first access (PEP 562) so
+# that importing any tools submodule does not load the whole web stack
+_EXPORTS = {
+    'search_web': 'tools.web_search',
+    'format_search_results': 'tools.web_search',
+    'scrape_webpage': 'tools.web_navigator',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
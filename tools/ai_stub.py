@@ -1,14 +1,27 @@
+import re
+from functools import lru_cache
+
+# App keyword -> shell command; "calculator" precedes "calc" so the longer word matches first
+_APP_MAP = {
+    "edge": "start msedge",
+    "chrome": "start chrome",
+    "notepad": "start notepad",
+    "calculator": "start calc",
+    "calc": "start calc",
+}
+_APP_RE = re.compile("|".join(map(re.escape, _APP_MAP)))
+
 class GeminiClient:
+    def __init__(self):
+        # Per-instance cache so identical prompts skip the model call (and
+        # the cache does not keep the instance alive, as a decorated method would)
+        self._cached_generate = lru_cache(maxsize=512)(self._generate_text)
+    
     def generate_text(self, prompt: str) -> str:
+        return self._cached_generate(prompt)
+    
+    def _generate_text(self, prompt: str) -> str:
         # Simple stub for AI command suggestion — replace with real model/service later
-        # If prompt refers to opening Edge, return start msedge
-        user_task = prompt.lower()
-        if "edge" in user_task:
-            return "start msedge"
-        if "chrome" in user_task:
-            return "start chrome"
-        if "notepad" in user_task:
-            return "start notepad"
-        if "calculator" in user_task or "calc" in user_task:
-            return "start calc"
-        return "N/A"
+        # One scan finds the first app mentioned, e.g. "edge" -> start msedge
+        match = _APP_RE.search(prompt.lower())
+        return _APP_MAP[match.group(0)] if match else "N/A"
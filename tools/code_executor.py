@@ -2,13 +2,54 @@
 
 import sys
 import io
+import importlib
+import importlib.util
 import traceback
+from functools import lru_cache
 from typing import Dict, Any
 from contextlib import redirect_stdout, redirect_stderr
 from core.logger import logger
-import matplotlib
-matplotlib.use('Agg')  # Non-interactive backend
-import matplotlib.pyplot as plt
+
+class _LazyModule:
+    """Module stand-in that imports the real module on first attribute access."""
+    
+    __slots__ = ("_name", "_module")
+    
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+    
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+    
+    def __repr__(self) -> str:
+        return f"<lazy module '{self._name}'>"
+
+
+@lru_cache(maxsize=None)
+def _use_agg_backend():
+    """Select the non-interactive matplotlib backend, once.
+    
+    Only the matplotlib package is imported, not pyplot, and unlike
+    MPLBACKEND the choice does not leak into child processes. It applies
+    however user code reaches pyplot (the plt alias or its own import).
+    """
+    if importlib.util.find_spec('matplotlib') is not None:
+        importlib.import_module('matplotlib').use('Agg')
+
+
+@lru_cache(maxsize=256)
+def _compile_exec(source: str):
+    """Compile a code snippet once; repeated snippets reuse the code object."""
+    return compile(source, '<string>', 'exec')
+
+
+@lru_cache(maxsize=256)
+def _compile_eval(source: str):
+    """Compile an expression once; repeated expressions reuse the code object."""
+    return compile(source, '<string>', 'eval')
 
 
 class CodeExecutor:
@@ -43,17 +84,22 @@ class CodeExecutor:
             'plt': 'matplotlib.pyplot',
         }
         
+        # Slow to import, so only imported once user code touches them
+        lazy_modules = {'numpy', 'pandas', 'matplotlib', 'matplotlib.pyplot'}
+        
         for alias, module_name in safe_imports.items():
-            try:
-                module = __import__(module_name)
-                if '.' in module_name:
-                    # Handle submodules like matplotlib.pyplot
-                    parts = module_name.split('.')
-                    for part in parts[1:]:
-                        module = getattr(module, part)
-                self.globals_dict[alias] = module
-            except ImportError:
-                pass  # Library not installed
+            if module_name not in lazy_modules:
+                try:
+                    self.globals_dict[alias] = importlib.import_module(module_name)
+                except ImportError:
+                    pass  # Library not installed
+                continue
+            
+            # Checking the top-level package finds missing libraries without
+            # importing anything (submodules like matplotlib.pyplot included)
+            if importlib.util.find_spec(module_name.partition('.')[0]) is None:
+                continue  # Library not installed
+            self.globals_dict[alias] = _LazyModule(module_name)
     
     def execute_code(
         self,
@@ -76,19 +122,23 @@ class CodeExecutor:
             stdout_capture = io.StringIO()
             stderr_capture = io.StringIO()
             
+            _use_agg_backend()
+            
             # Execute code
             with redirect_stdout(stdout_capture), redirect_stderr(stderr_capture):
-                exec(code, self.globals_dict)
+                exec(_compile_exec(code), self.globals_dict)
             
             stdout = stdout_capture.getvalue()
             stderr = stderr_capture.getvalue()
             
-            # Check for plots
+            # Check for plots; if pyplot was never imported there can be none
             plot_path = None
-            if return_plot and plt.get_fignums():
-                plot_path = f"output_plot_{id(code)}.png"
-                plt.savefig(plot_path, bbox_inches='tight', dpi=100)
-                plt.close('all')
+            if return_plot and 'matplotlib.pyplot' in sys.modules:
+                plt = sys.modules['matplotlib.pyplot']
+                if plt.get_fignums():
+                    plot_path = f"output_plot_{id(code)}.png"
+                    plt.savefig(plot_path, bbox_inches='tight', dpi=100)
+                    plt.close('all')
             
             logger.info("Code executed successfully")
             
@@ -122,7 +172,7 @@ class CodeExecutor:
             Result dict with value
         """
         try:
-            result = eval(expression, self.globals_dict)
+            result = eval(_compile_eval(expression), self.globals_dict)
             logger.info(f"Expression evaluated: {expression}")
             
             return {
@@ -0,0 +1,33 @@
+"""Shared lxml parsing for web tools."""
+
+from functools import lru_cache
+from typing import Optional, Union
+import lxml.html
+
+
+@lru_cache(maxsize=32)
+def _html_parser(encoding: Optional[str]) -> lxml.html.HTMLParser:
+    """Get an lxml parser for an encoding; None lets lxml read <meta charset>."""
+    try:
+        return lxml.html.HTMLParser(encoding=encoding)
+    except LookupError:
+        return lxml.html.HTMLParser()
+
+
+def load_document(html: Union[str, bytes], encoding: Optional[str] = None):
+    """Parse HTML (text or raw bytes) into an lxml document.
+    
+    Bytes are handed to the parser undecoded; str is re-encoded to UTF-8,
+    which lxml parses faster than str and which sidesteps its refusal of
+    str input with an XML declaration.
+    
+    Args:
+        html: HTML content
+        encoding: Charset of raw bytes, if known
+        
+    Returns:
+        Root element of the parsed document
+    """
+    if isinstance(html, str):
+        html, encoding = html.encode('utf-8'), 'utf-8'
+    return lxml.html.document_fromstring(html, parser=_html_parser(encoding))
@@ -0,0 +1,114 @@
+"""Shared HTTP session for web tools."""
+
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Optional
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# Content types worth downloading and parsing as pages
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+# Leading bytes of PDF, ZIP (incl. docx/xlsx), PNG and JPEG files
+BINARY_SIGNATURES = (b'%PDF', b'PK\x03\x04', b'\x89PNG', b'\xff\xd8\xff')
+
+
+@lru_cache(maxsize=1)
+def get_session() -> requests.Session:
+    """Get the shared session, so keep-alive connections are reused.
+    
+    Returns:
+        Session with pooled, retrying adapters and default headers
+    """
+    retry = Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET", "HEAD"]
+    )
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retry)
+    
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+def is_html(response: requests.Response) -> bool:
+    """Check whether a response declares an HTML body (or no type at all).
+    
+    Args:
+        response: Response whose headers have been received
+    
+    Returns:
+        True if the body should be parsed as HTML
+    """
+    content_type = response.headers.get('Content-Type', '')
+    return not content_type or content_type.lower().startswith(HTML_CONTENT_TYPES)
+
+
+def read_capped(response: requests.Response, max_bytes: int) -> Optional[bytes]:
+    """Read a streamed response body, stopping after max_bytes.
+    
+    The first few bytes are checked before the rest is downloaded, so
+    mislabelled PDFs, images and archives are dropped straight away.
+    
+    Args:
+        response: Response requested with stream=True
+        max_bytes: Maximum bytes to read
+    
+    Returns:
+        Body bytes truncated to max_bytes, or None for a binary file
+    """
+    first = next(response.iter_content(chunk_size=8), b'')
+    if first.startswith(BINARY_SIGNATURES):
+        return None
+    
+    chunks = [first]
+    total = len(first)
+    for chunk in response.iter_content(chunk_size=65536):
+        chunks.append(chunk)
+        total += len(chunk)
+        if total >= max_bytes:
+            break
+    return b''.join(chunks)[:max_bytes]
+
+
+class DomainLimiter:
+    """Per-host request throttle; different hosts never wait on each other."""
+    
+    def __init__(self, rate: float = 1.0):
+        """Initialize limiter.
+        
+        Args:
+            rate: Requests per second allowed to each host
+        """
+        self.rate = rate
+        self._next: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def acquire(self, url: str):
+        """Block until a request to url's host is allowed.
+        
+        Args:
+            url: URL about to be requested
+        """
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + 1 / self.rate
+        
+        # Sleep outside the lock so other hosts are not held up
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# Global instance
+domain_limiter = DomainLimiter()
@@ -1,19 +1,123 @@
+"""Windows system control: apps, files, screenshots and processes."""
+
+import heapq
+import os
 import subprocess
 import shlex
+import shutil
 import time
+from functools import lru_cache
 import pyautogui
 import psutil
+try:
+    import mss
+    from PIL import Image
+except ImportError:
+    mss = None  # Fall back to pyautogui's slower capture
 from typing import List, Dict, Optional
 from pathlib import Path
 from core.logger import logger
 from tools.ai_stub import GeminiClient
 
+# How long a process table snapshot is reused by chained process tools
+_PROC_CACHE_TTL = 0.5
+
+# Friendly app names -> Windows executables / shell names
+APP_COMMANDS = {
+    'chrome': 'chrome',
+    'edge': 'msedge',
+    'firefox': 'firefox',
+    'notepad': 'notepad',
+    'calculator': 'calc',
+    'calc': 'calc',
+    'explorer': 'explorer',
+    'file explorer': 'explorer',
+    'paint': 'mspaint',
+    'cmd': 'cmd',
+    'powershell': 'powershell',
+    'word': 'winword',
+    'excel': 'excel',
+    'vscode': 'code',
+    'vs code': 'code',
+}
+
+# Launched apps must not be tied to the assistant's console (Windows-only flags)
+_DETACHED_FLAGS = (
+    getattr(subprocess, 'DETACHED_PROCESS', 0)
+    | getattr(subprocess, 'CREATE_NEW_PROCESS_GROUP', 0)
+)
+
+@lru_cache(maxsize=256)
+def _split(command: str) -> tuple:
+    """Split a command line once; repeated commands reuse the result."""
+    return tuple(shlex.split(command))
+
+def _command_line(command: str, prefix: tuple = ()):
+    """Popen args for a command line, optionally after already-split arguments.
+    
+    Windows programs parse their own command line, and POSIX shlex rules
+    would eat the backslashes in paths like C:\\Users, so there the line is
+    passed through as one string; elsewhere it is split.
+    """
+    if os.name == 'nt':
+        return f"{subprocess.list2cmdline(prefix)} {command}" if prefix else command
+    return [*prefix, *_split(command)]
+
+def _grab_screen():
+    """Capture the primary screen as a PIL image, via mss when available."""
+    if mss is None:
+        return pyautogui.screenshot()
+    with mss.mss() as sct:
+        shot = sct.grab(sct.monitors[1])
+    return Image.frombytes('RGB', shot.size, shot.bgra, 'raw', 'BGRX')
+
 class SystemController:
     """Control Windows system operations."""
     
     def __init__(self):
         # Initialize Gemini AI client
         self.gemini_client = GeminiClient()
+        # (taken_at, [(process, name), ...]) from the last process table walk
+        self._proc_cache = (0.0, [])
+        # Executable name -> resolved path, so PATH is searched once per app
+        self._path_cache: Dict[str, str] = {}
+    
+    def _proc_snapshot(self) -> List[tuple]:
+        """List (process, name) pairs, reusing a walk from the last 0.5s."""
+        taken_at, snapshot = self._proc_cache
+        now = time.monotonic()
+        if now - taken_at >= _PROC_CACHE_TTL:
+            snapshot = [
+                (proc, proc.info['name'])
+                for proc in psutil.process_iter(['name'])
+                if proc.info['name']
+            ]
+            self._proc_cache = (now, snapshot)
+        return snapshot
+    
+    def open_application(self, app_name: str, args: str = "") -> Dict[str, str]:
+        """Launch an application without waiting for it to exit."""
+        command = APP_COMMANDS.get(app_name.lower().strip(), app_name)
+        resolved = self._path_cache.get(command)
+        if resolved is None:
+            resolved = shutil.which(command) or command
+            self._path_cache[command] = resolved
+        try:
+            if not args:
+                # One ShellExecute call, no intermediate cmd.exe
+                os.startfile(resolved)
+            else:
+                try:
+                    subprocess.Popen(_command_line(args, (resolved,)), close_fds=True, creationflags=_DETACHED_FLAGS)
+                except FileNotFoundError:
+                    # Not on PATH (e.g. registered under App Paths): let the shell resolve it
+                    full_command = f'start "" {command} {args}'
+                    subprocess.Popen(full_command, shell=True, close_fds=True, creationflags=_DETACHED_FLAGS)
+            logger.info(f"Opened application: {app_name}")
+            return {'success': True,'message': f"Opened {app_name}",'app': app_name}
+        except Exception as e:
+            logger.error(f"Error opening application: {e}")
+            return {'success': False,'message': f"Error: {str(e)}",'app': app_name}
     
     def open_application_dynamic(self, user_task: str) -> Dict[str, str]:
         """Dynamically generate and execute shell command to open application."""
@@ -34,8 +138,7 @@ class SystemController:
     
     def execute_shell_command(self, command: str) -> str:
         try:
-            cmd_parts = shlex.split(command)
-            result = subprocess.run(cmd_parts, capture_output=True, text=True, check=False)
+            result = subprocess.run(_command_line(command), capture_output=True, text=True, check=False)
             if result.returncode == 0:
                 return result.stdout.strip() or "Command executed successfully (no output)."
             else:
@@ -63,8 +166,7 @@ class SystemController:
     
     def create_file(self, path: str, content: str = "") -> Dict[str, str]:
         try:
-            with open(path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            Path(path).write_text(content, encoding='utf-8')
             logger.info(f"Created file: {path}")
             return {'success': True,'message': f"Created file: {path}",'path': path}
         except Exception as e:
@@ -84,9 +186,16 @@ class SystemController:
     def take_screenshot(self, save_path: Optional[str] = None) -> Dict[str, str]:
         try:
             if not save_path:
-                save_path = f"screenshot_{int(time.time())}.png"
-            screenshot = pyautogui.screenshot()
-            screenshot.save(save_path)
+                save_path = f"screenshot_{int(time.time())}.webp"
+            screenshot = _grab_screen()
+            suffix = Path(save_path).suffix.lower()
+            if suffix in ('.jpg', '.jpeg'):
+                screenshot.convert('RGB').save(save_path, 'JPEG', quality=85, optimize=False)
+            elif suffix == '.webp':
+                # method=0 is the fastest WebP encoder setting
+                screenshot.save(save_path, 'WEBP', quality=80, method=0)
+            else:
+                screenshot.save(save_path)
             logger.info(f"Screenshot saved: {save_path}")
             return {'success': True,'message': f"Screenshot saved to {save_path}",'path': save_path}
         except Exception as e:
@@ -95,22 +204,49 @@ class SystemController:
     
     def get_running_processes(self) -> List[str]:
         try:
-            processes = [proc.name() for proc in psutil.process_iter(['name'])]
-            return list(set(processes))[:50]
+            names = {name for _, name in self._proc_snapshot()}
+            return heapq.nsmallest(50, names)
         except Exception as e:
             logger.error(f"Error getting processes: {e}")
             return []
     
     def kill_process(self, process_name: str) -> Dict[str, str]:
         try:
-            killed = False
-            for proc in psutil.process_iter(['name']):
-                if proc.info['name'].lower() == process_name.lower():
+            target = process_name.lower()
+            matches = [proc for proc, name in self._proc_snapshot() if name.lower() == target]
+            
+            # Ask every match to exit at once, then force-kill whatever is left
+            signalled = []
+            denied = []
+            for proc in matches:
+                try:
+                    proc.terminate()
+                    signalled.append(proc)
+                except psutil.NoSuchProcess:
+                    continue  # Exited since the snapshot was taken
+                except psutil.AccessDenied:
+                    denied.append(proc.pid)  # e.g. elevated or another user's
+            _, alive = psutil.wait_procs(signalled, timeout=2)
+            for proc in alive:
+                try:
                     proc.kill()
-                    killed = True
+                except psutil.NoSuchProcess:
+                    pass
+                except psutil.AccessDenied:
+                    signalled.remove(proc)
+                    denied.append(proc.pid)
+            killed = len(signalled)
+            if denied:
+                logger.warning(f"Access denied killing {process_name}: PIDs {denied}")
             if killed:
-                logger.info(f"Killed process: {process_name}")
-                return {'success': True,'message': f"Killed {process_name}",'process': process_name}
+                self._proc_cache = (0.0, [])
+                logger.info(f"Killed process: {process_name} ({killed} processes)")
+                message = f"Killed {process_name} ({killed} processes)"
+                if denied:
+                    message += f"; access denied for {len(denied)}"
+                return {'success': True,'message': message,'process': process_name,'count': killed,'denied': denied}
+            elif denied:
+                return {'success': False,'message': f"Access denied killing {process_name} ({len(denied)} processes)",'process': process_name,'denied': denied}
             else:
                 return {'success': False,'message': f"Process {process_name} not found",'process': process_name}
         except Exception as e:
@@ -1,27 +1,33 @@
 """Enhanced tool manager with system control and code execution."""
 
+import threading
 import time
 from typing import Dict, List
 from core.logger import logger
-from tools.web_search import search_web, format_search_results
-from tools.web_navigator import scrape_webpage
-from tools.web_processor import search_and_read, format_search_and_read_results
 from tools.system_control import system_controller
 from tools.code_executor import code_executor
 from tools.tool_registry import registry
 
+# At most 5 searches per second overall; see http_client.domain_limiter
+MIN_SEARCH_INTERVAL = 0.2
+
 
 class ToolManager:
     """Manages all tools including system control and code execution."""
     
     def __init__(self):
         """Initialize and register all tools."""
-        self.last_search_time = 0
+        self.last_search_time = float('-inf')
+        self._rate_lock = threading.Lock()
         self._register_all_tools()
         logger.info("Enhanced tool manager initialized")
     
     def _register_all_tools(self):
         """Register all available tools."""
+        # Idempotent: a second ToolManager reuses the tools already registered
+        if "web_search" in registry.tools:
+            logger.debug("Tools already registered")
+            return
         
         # Web search tools (already registered in previous version)
         registry.register(
@@ -138,24 +144,35 @@ class ToolManager:
             examples=["calculate(expression=\"2 ** 10\")"]
         )
     
-    # Web tools
+    # Web tools (the web stack - requests, lxml - is imported on first use)
     def web_search(self, query: str, max_results: int = 5) -> str:
         """Quick web search."""
-        self._rate_limit()
+        from tools.web_search import search_web, format_search_results
+        
+        # Cached results need no request, so skip the delay for them
+        if not search_web.cache_contains(query, max_results):
+            self._rate_limit()
         results = search_web(query, max_results)
         return format_search_results(results)
     
     def read_webpage(self, url: str) -> str:
         """Read webpage."""
-        result = scrape_webpage(url)
+        from tools.web_navigator import scrape_webpage
+        
+        # Only the text is shown, so skip link extraction
+        result = scrape_webpage(url, include_links=False)
         if result['error']:
             return f"Error: {result['error']}"
         return f"**{url}**\n\n{result['text'][:2000]}"
     
     def smart_search(self, query: str, num_results: int = 3) -> str:
         """Smart search."""
-        self._rate_limit()
-        result = search_and_read(query, num_results=min(num_results, 5))
+        from tools.web_processor import search_and_read, format_search_and_read_results
+        
+        num_results = min(num_results, 5)
+        if not search_and_read.cache_contains(query, num_results=num_results):
+            self._rate_limit()
+        result = search_and_read(query, num_results=num_results)
         return format_search_and_read_results(result)
     
     # System control tools
@@ -188,8 +205,10 @@ class ToolManager:
         return f"Error: {result['error']}"
     
     def _rate_limit(self):
-        """Rate limiting."""
-        time_since_last = time.time() - self.last_search_time
-        if time_since_last < 2:
-            time.sleep(2 - time_since_last)
-        self.last_search_time = time.time()
+        """Rate limiting (global cap; page fetches are throttled per host)."""
+        # Monotonic clock: wall-clock adjustments cannot stretch the wait
+        with self._rate_lock:
+            wait = self.last_search_time + MIN_SEARCH_INTERVAL - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self.last_search_time = time.monotonic()
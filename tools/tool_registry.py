@@ -3,10 +3,15 @@
 from typing import Dict, List, Any, Callable
 from core.logger import logger
 
+# Prompt section for one tool; params and examples are pre-rendered lines
+_TOOL_TEMPLATE = "### {name}\n{description}\n\n**Parameters:**\n{params}{examples}"
+
 
 class Tool:
     """Tool definition."""
     
+    __slots__ = ("name", "description", "parameters", "function", "examples", "_dict")
+    
     def __init__(
         self,
         name: str,
@@ -20,16 +25,18 @@ class Tool:
         self.parameters = parameters
         self.function = function
         self.examples = examples or []
-    
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary format."""
-        return {
+        # Tools are not modified after registration, so build the dict once
+        self._dict = {
             "name": self.name,
             "description": self.description,
             "parameters": self.parameters,
             "examples": self.examples
         }
     
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary format."""
+        return self._dict
+    
     def execute(self, **kwargs) -> Any:
         """Execute the tool."""
         return self.function(**kwargs)
@@ -38,9 +45,14 @@ class Tool:
 class ToolRegistry:
     """Registry of available tools."""
     
+    __slots__ = ("tools", "_schema_cache", "_prompt_cache")
+    
     def __init__(self):
         """Initialize registry."""
         self.tools: Dict[str, Tool] = {}
+        # Built on first use and reset whenever a tool is registered
+        self._schema_cache = None
+        self._prompt_cache = None
         logger.info("Tool registry initialized")
     
     def register(
@@ -62,6 +74,8 @@ class ToolRegistry:
         """
         tool = Tool(name, description, parameters, function, examples)
         self.tools[name] = tool
+        self._schema_cache = None
+        self._prompt_cache = None
         logger.info(f"Registered tool: {name}")
     
     def get_tool(self, name: str) -> Tool:
@@ -74,7 +88,9 @@ class ToolRegistry:
     
     def get_tools_schema(self) -> List[Dict[str, Any]]:
         """Get schema for all tools (for AI context)."""
-        return [tool.to_dict() for tool in self.tools.values()]
+        if self._schema_cache is None:
+            self._schema_cache = [tool.to_dict() for tool in self.tools.values()]
+        return self._schema_cache
     
     def execute_tool(self, name: str, **kwargs) -> Any:
         """Execute a tool by name.
@@ -99,28 +115,33 @@ class ToolRegistry:
     
     def format_tools_for_prompt(self) -> str:
         """Format tools for AI prompt."""
-        output = ["**Available Tools:**\n"]
+        if self._prompt_cache is not None:
+            return self._prompt_cache
+        
+        blocks = ["**Available Tools:**\n"]
         
         for tool in self.tools.values():
-            output.append(f"### {tool.name}")
-            output.append(f"{tool.description}\n")
-            output.append("**Parameters:**")
-            
-            for param_name, param_info in tool.parameters.get("properties", {}).items():
-                param_type = param_info.get("type", "string")
-                param_desc = param_info.get("description", "")
-                required = param_name in tool.parameters.get("required", [])
-                req_marker = " (required)" if required else " (optional)"
-                output.append(f"- `{param_name}` ({param_type}){req_marker}: {param_desc}")
-            
+            required = tool.parameters.get("required", [])
+            params = "".join(
+                f"- `{param_name}` ({param_info.get('type', 'string')})"
+                f"{' (required)' if param_name in required else ' (optional)'}: "
+                f"{param_info.get('description', '')}\n"
+                for param_name, param_info in tool.parameters.get("properties", {}).items()
+            )
+            examples = ""
             if tool.examples:
-                output.append("\n**Examples:**")
-                for example in tool.examples:
-                    output.append(f"- {example}")
+                examples = "\n**Examples:**\n" + "".join(f"- {example}\n" for example in tool.examples)
             
-            output.append("")
+            # One format call per tool instead of an append per line
+            blocks.append(_TOOL_TEMPLATE.format(
+                name=tool.name,
+                description=tool.description,
+                params=params,
+                examples=examples
+            ))
         
-        return "\n".join(output)
+        self._prompt_cache = "\n".join(blocks)
+        return self._prompt_cache
 
 
 # Global registry instance
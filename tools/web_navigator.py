@@ -1,118 +1,304 @@
-"""Web navigation and scraping using requests and BeautifulSoup."""
+"""Web navigation and scraping using requests and lxml."""
 
-import requests
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional
+import re
+from html import unescape
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urldefrag, urljoin
+from core.cache import TTLCache, ttl_cache
 from core.logger import logger
+from tools.html_parse import load_document
+from tools.http_client import domain_limiter, get_session, is_html, read_capped
 
+# Pages are truncated past this size; the text that matters comes first
+MAX_HTML_BYTES = 512 * 1024
 
-def fetch_webpage(url: str, timeout: int = 10) -> Optional[str]:
-    """Fetch webpage content.
+# scrape_webpage output limits, applied while extracting
+MAX_TEXT_CHARS = 5000
+MAX_LINKS = 20
+
+# url -> (etag, last_modified, body, charset) for conditional re-fetches
+_validators = TTLCache(maxsize=64, ttl=3600)
+
+_PHRASE_BREAK_RE = re.compile(r' {2,}')
+_LINE_BREAK_RE = re.compile(r'\s*[\r\n]\s*')
+
+# Anchor with a quoted href and plain text, for extract_links_fast
+_ANCHOR_RE = re.compile(
+    rb'''<a\s[^>]*?href\s*=\s*["']([^"']+)["'][^>]*>([^<]{0,200})</a>''',
+    re.IGNORECASE | re.DOTALL
+)
+
+def _download(url: str, timeout: int = 10) -> Optional[Tuple[bytes, Optional[str]]]:
+    """Download a page's raw HTML bytes.
     
     Args:
         url: URL to fetch
         timeout: Request timeout in seconds
         
     Returns:
-        HTML content or None if error
+        Tuple of (body, charset from Content-Type or None), or None if error
     """
     try:
+        domain_limiter.acquire(url)
         logger.info(f"Fetching: {url}")
         
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
+        # Revalidate a previous copy so an unchanged page costs a bodiless 304
+        cached = _validators.get(url)
+        headers = {}
+        if cached:
+            etag, last_modified, _, _ = cached
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
         
-        response = requests.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()
-        
-        return response.text
+        # Pooled session: keep-alive connections and default headers are shared.
+        # Streaming lets non-HTML bodies be skipped and huge pages be cut short.
+        with get_session().get(url, headers=headers, timeout=timeout, stream=True) as response:
+            if cached and response.status_code == 304:
+                logger.info(f"Not modified: {url}")
+                return cached[2], cached[3]
+            
+            response.raise_for_status()
+            
+            if not is_html(response):
+                logger.warning(f"Skipping non-HTML content at {url}: {response.headers.get('Content-Type')}")
+                return None
+            
+            body = read_capped(response, MAX_HTML_BYTES)
+            if body is None:
+                logger.warning(f"Skipping binary file at {url}")
+                return None
+            
+            # Only a declared charset counts: requests would assume ISO-8859-1
+            # for text/html, and apparent_encoding scans the whole body
+            declared = 'charset' in response.headers.get('Content-Type', '').lower()
+            charset = response.encoding if declared else None
+            
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if etag or last_modified:
+                _validators.set(url, (etag, last_modified, body, charset))
+            
+            return body, charset
         
     except Exception as e:
         logger.error(f"Error fetching {url}: {e}")
         return None
 
 
-def extract_text(html: str) -> str:
-    """Extract clean text from HTML.
+def fetch_webpage(url: str, timeout: int = 10) -> Optional[str]:
+    """Fetch webpage content.
     
     Args:
-        html: HTML content
+        url: URL to fetch
+        timeout: Request timeout in seconds
         
     Returns:
-        Cleaned text
+        HTML content or None if error
     """
+    page = _download(url, timeout)
+    if page is None:
+        return None
+    
+    body, charset = page
     try:
-        soup = BeautifulSoup(html, 'html.parser')
+        return body.decode(charset or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+def _document_text(doc, limit: Optional[int] = None) -> str:
+    """Get clean text, up to limit chars, from a parsed document (removes script/style)."""
+    # Remove script and style elements
+    for script in list(doc.iter('script', 'style')):
+        script.drop_tree()
+    
+    # Get text
+    text = doc.text_content()
+    
+    if limit is None:
+        return _clean_text(text)
+    
+    # Cleaning only shrinks text and a cleaned prefix is a prefix of the
+    # cleaned whole, so clean growing windows until there is enough
+    window = limit * 2
+    while True:
+        cleaned = _clean_text(text[:window])
+        if len(cleaned) >= limit or window >= len(text):
+            return cleaned[:limit]
+        window *= 2
+
+
+def _clean_text(text: str) -> str:
+    """Collapse whitespace in extracted text."""
+    # Double spaces break phrases onto their own lines, then blank lines
+    # and the whitespace around line breaks collapse
+    text = _PHRASE_BREAK_RE.sub('\n', text)
+    return _LINE_BREAK_RE.sub('\n', text).strip()
+
+
+def _document_links(doc, base_url: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+    """Get up to limit absolute links with text from a parsed document."""
+    anchors = (
+        (a.get('href'), a.text_content().strip())
+        for a in doc.iter('a')
+        if a.get('href') is not None
+    )
+    return _resolve_links(anchors, base_url, limit)
+
+
+def _resolve_links(anchors, base_url: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+    """Turn (href, text) pairs into unique absolute links with text.
+    
+    anchors is consumed lazily, so stopping at limit skips the rest.
+    """
+    links = []
+    seen = set()
+    
+    for href, text in anchors:
+        if limit is not None and len(links) >= limit:
+            break
         
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
+        if not text:
+            continue
         
-        # Get text
-        text = soup.get_text()
+        # Resolve relative URLs (incl. //host and ?query forms); drop #fragments
+        url, _ = urldefrag(urljoin(base_url, href.strip()))
+        if not url.startswith(('http://', 'https://')) or url in seen:
+            continue
         
-        # Clean up whitespace
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        text = '\n'.join(chunk for chunk in chunks if chunk)
+        seen.add(url)
+        links.append({
+            'text': text,
+            'url': url
+        })
+    
+    return links
+
+
+def _parse(
+    html: Union[str, bytes],
+    base_url: str,
+    encoding: Optional[str] = None,
+    include_links: bool = True,
+    text_limit: Optional[int] = None,
+    link_limit: Optional[int] = None
+) -> Tuple[str, List[Dict[str, str]]]:
+    """Extract text and links from a single parse of the page.
+    
+    Args:
+        html: HTML content, as text or raw bytes
+        base_url: Base URL for resolving relative links
+        encoding: Charset of raw bytes, if known
+        include_links: Whether to collect links (empty list if not)
+        text_limit: Maximum characters of text
+        link_limit: Maximum number of links
+        
+    Returns:
+        Tuple of (cleaned text, links)
+    """
+    try:
+        doc = load_document(html, encoding)
+        
+        # Links first: collecting text removes elements from the tree
+        links = _document_links(doc, base_url, link_limit) if include_links else []
+        return _document_text(doc, text_limit), links
+        
+    except Exception as e:
+        logger.error(f"Error parsing webpage: {e}")
+        return "", []
+
+
+def extract_text(html: str, limit: Optional[int] = None) -> str:
+    """Extract clean text from HTML.
+    
+    Args:
+        html: HTML content
+        limit: Maximum characters to return
         
-        return text
+    Returns:
+        Cleaned text
+    """
+    try:
+        return _document_text(load_document(html), limit)
         
     except Exception as e:
         logger.error(f"Error extracting text: {e}")
         return ""
 
 
-def extract_links(html: str, base_url: str) -> List[Dict[str, str]]:
+def extract_links(html: str, base_url: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
     """Extract all links from HTML.
     
     Args:
         html: HTML content
         base_url: Base URL for resolving relative links
+        limit: Maximum number of links
         
     Returns:
         List of links with text and href
     """
     try:
-        soup = BeautifulSoup(html, 'html.parser')
-        links = []
-        
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            text = a.get_text(strip=True)
-            
-            # Resolve relative URLs
-            if href.startswith('/'):
-                href = base_url.rstrip('/') + href
-            elif not href.startswith('http'):
-                continue
-            
-            if text and href:
-                links.append({
-                    'text': text,
-                    'url': href
-                })
-        
-        return links
+        return _document_links(load_document(html), base_url, limit)
         
     except Exception as e:
         logger.error(f"Error extracting links: {e}")
         return []
 
 
-def scrape_webpage(url: str) -> Dict[str, any]:
+def extract_links_fast(
+    html: Union[str, bytes],
+    base_url: str,
+    encoding: Optional[str] = None,
+    limit: Optional[int] = None
+) -> List[Dict[str, str]]:
+    """Extract links with a regex scan instead of a full parse.
+    
+    This is a heuristic, not an HTML parser: it only finds quoted hrefs on
+    anchors whose text has no nested tags, so it can miss links that
+    extract_links would find. Use it when only links are needed.
+    
+    Args:
+        html: HTML content, as text or raw bytes
+        base_url: Base URL for resolving relative links
+        encoding: Charset of raw bytes (UTF-8 if not given)
+        limit: Maximum number of links
+        
+    Returns:
+        List of links with text and href
+    """
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+        encoding = 'utf-8'
+    encoding = encoding or 'utf-8'
+    
+    anchors = (
+        (
+            unescape(match.group(1).decode(encoding, errors='replace')),
+            unescape(match.group(2).decode(encoding, errors='replace')).strip()
+        )
+        for match in _ANCHOR_RE.finditer(html)
+    )
+    return _resolve_links(anchors, base_url, limit)
+
+
+# Pages are re-requested often within a conversation; failures are not cached
+@ttl_cache(maxsize=256, ttl=300, cache_if=lambda result: result['error'] is None)
+def scrape_webpage(url: str, include_links: bool = True) -> Dict[str, any]:
     """Scrape webpage for text and links.
     
     Args:
         url: URL to scrape
+        include_links: Whether to collect links; callers that only read the
+            text can skip walking every anchor
         
     Returns:
         Dict with url, text, and links
     """
-    html = fetch_webpage(url)
+    page = _download(url)
     
-    if not html:
+    if not page or not page[0]:
         return {
             'url': url,
             'text': '',
@@ -120,13 +306,18 @@ def scrape_webpage(url: str) -> Dict[str, any]:
             'error': 'Failed to fetch webpage'
         }
     
-    text = extract_text(html)
-    links = extract_links(html, url)
+    # Parse the raw bytes; skipping the str decode lets lxml do it in C
+    body, charset = page
+    text, links = _parse(
+        body, url, charset, include_links,
+        text_limit=MAX_TEXT_CHARS,
+        link_limit=MAX_LINKS
+    )
     
     return {
         'url': url,
-        'text': text[:5000],  # Limit text to 5000 chars
-        'links': links[:20],   # Limit to 20 links
+        'text': text,
+        'links': links,
         'error': None
     }
 
@@ -1,102 +1,183 @@
 """Advanced web content processing."""
 
-import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict, Optional
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple, Union
+from lxml import etree
+from core.cache import ttl_cache
 from core.logger import logger
 from tools.web_search import search_web
-from tools.web_navigator import scrape_webpage
+from tools.html_parse import load_document
+from tools.http_client import domain_limiter, get_session, is_html, read_capped
 import concurrent.futures
 
+# Smallest HTML download per page, however few characters are wanted
+MIN_HTML_BYTES = 64 * 1024
 
-def extract_main_content(html: str) -> str:
+# Pages declaring a larger body are skipped without downloading
+MAX_CONTENT_LENGTH = 5_000_000
+
+# Navigation, scripts and other non-content elements
+_NOISE_TAGS = ('script', 'style', 'nav', 'footer', 'header',
+               'aside', 'iframe', 'noscript', 'form')
+
+
+def _has_class(name: str) -> str:
+    """XPath for elements with name as one of their classes (CSS .name)."""
+    return f'//*[contains(concat(" ", normalize-space(@class), " "), " {name} ")]'
+
+
+# Common content containers in priority order, compiled once; each is tried
+# separately because a union would return document order, not priority
+_CONTENT_XPATHS = tuple(etree.XPath(f'({path})[1]') for path in (
+    '//article',
+    '//main',
+    '//*[@role="main"]',
+    _has_class('content'),
+    '//*[@id="content"]',
+    _has_class('post-content'),
+    _has_class('entry-content'),
+))
+
+
+def _main_content(doc) -> str:
+    """Get the main content text of a parsed page, removing noise."""
+    # Remove unwanted elements and comments, keeping the text that follows them
+    etree.strip_elements(doc, etree.Comment, *_NOISE_TAGS, with_tail=False)
+    
+    # Look for common content containers
+    main_content = None
+    for xpath in _CONTENT_XPATHS:
+        found = xpath(doc)
+        if found:
+            main_content = found[0]
+            break
+    
+    # Fallback to body
+    if main_content is None:
+        main_content = doc.find('body')
+    
+    if main_content is None:
+        return ""
+    
+    # Get text, one line per text node
+    text = '\n'.join(main_content.itertext())
+    
+    # Clean up excessive whitespace (one strip per line, no intermediate list)
+    return '\n'.join(stripped for stripped in (line.strip() for line in text.split('\n')) if stripped)
+
+
+def extract_main_content(
+    html: Union[str, bytes, None] = None,
+    encoding: Optional[str] = None,
+    doc=None
+) -> str:
     """Extract main content from HTML, removing noise.
     
     Args:
-        html: HTML content
-        
+        html: HTML content, as text or raw bytes
+        encoding: Charset of raw bytes, if known
+        doc: Already parsed lxml document to use instead of html (noise is
+            removed from it in place)
+    
     Returns:
         Clean main content
     """
     try:
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Remove unwanted elements
-        for element in soup(['script', 'style', 'nav', 'footer', 'header', 
-                            'aside', 'iframe', 'noscript', 'form']):
-            element.decompose()
-        
-        # Try to find main content
-        main_content = None
-        
-        # Look for common content containers
-        for selector in ['article', 'main', '[role="main"]', '.content', 
-                        '#content', '.post-content', '.entry-content']:
-            main_content = soup.select_one(selector)
-            if main_content:
-                break
-        
-        # Fallback to body
-        if not main_content:
-            main_content = soup.find('body')
-        
-        if not main_content:
-            return ""
-        
-        # Get text
-        text = main_content.get_text(separator='\n', strip=True)
+        return _main_content(doc if doc is not None else load_document(html, encoding))
+    
+    except Exception as e:
+        logger.error(f"Content extraction error: {e}")
+        return ""
+
+
+def _fetch_html(url: str, max_bytes: int) -> Tuple[bytes, Optional[str]]:
+    """Download up to max_bytes of a page's HTML with its declared charset."""
+    domain_limiter.acquire(url)
+    logger.info(f"Fetching: {url}")
+    
+    # Shared session: keep-alive connections and the User-Agent header.
+    # Streaming stops the download once enough HTML for max_chars is in.
+    with get_session().get(url, timeout=10, stream=True) as response:
+        response.raise_for_status()
         
-        # Clean up excessive whitespace
-        lines = [line.strip() for line in text.split('\n') if line.strip()]
-        text = '\n'.join(lines)
+        # Headers alone rule out non-HTML files and huge dumps
+        if not is_html(response):
+            raise ValueError(f"Not an HTML page ({response.headers.get('Content-Type')})")
+        length = response.headers.get('Content-Length', '')
+        if length.isdigit() and int(length) > MAX_CONTENT_LENGTH:
+            raise ValueError(f"Page too large ({int(length)} bytes)")
         
-        return text
+        body = read_capped(response, max_bytes)
+        if body is None:
+            raise ValueError("Not an HTML page (binary file)")
         
+        # Only a declared charset is passed on: requests falls back to
+        # ISO-8859-1 for text/html, and apparent_encoding runs chardet
+        declared = 'charset' in response.headers.get('Content-Type', '').lower()
+        return body, response.encoding if declared else None
+
+
+def _html_budget(max_chars: int) -> int:
+    """Bytes of HTML to download for max_chars of text."""
+    # Markup is most of a page; the floor leaves room for a long <head>
+    return max(max_chars * 10, MIN_HTML_BYTES)
+
+
+def _parse_page(url: str, page: Tuple[bytes, Optional[str]], max_chars: int) -> Dict[str, str]:
+    """Extract title and main content from a downloaded page."""
+    # One parse serves both the title and the content
+    try:
+        doc = load_document(*page)
     except Exception as e:
-        logger.error(f"Content extraction error: {e}")
-        return ""
+        # e.g. lxml rejects a body that is empty after decoding
+        logger.error(f"Error parsing {url}: {e}")
+        return {
+            'url': url,
+            'title': 'Error',
+            'content': '',
+            'success': False
+        }
+    
+    # Get title
+    title = doc.find('.//title')
+    title = title.text_content().strip() if title is not None else url
+    
+    # Get content
+    content = extract_main_content(doc=doc)
+    
+    # Limit content length
+    if len(content) > max_chars:
+        content = content[:max_chars] + "..."
+    
+    return {
+        'url': url,
+        'title': title,
+        'content': content,
+        'success': True
+    }
+
+
+@lru_cache(maxsize=1)
+def _get_fetch_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """Get the shared page download threads, started on first use."""
+    return concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="fetch")
 
 
+# Failed fetches are not cached so they are retried next time
+@ttl_cache(maxsize=256, ttl=3600, cache_if=lambda page: page['success'])
 def fetch_and_extract(url: str, max_chars: int = 3000) -> Dict[str, str]:
     """Fetch URL and extract main content.
     
     Args:
         url: URL to fetch
         max_chars: Maximum characters to return
-        
+    
     Returns:
         Dict with url, title, and content
     """
     try:
-        logger.info(f"Fetching: {url}")
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Get title
-        title = soup.find('title')
-        title = title.get_text(strip=True) if title else url
-        
-        # Get content
-        content = extract_main_content(response.text)
-        
-        # Limit content length
-        if len(content) > max_chars:
-            content = content[:max_chars] + "..."
-        
-        return {
-            'url': url,
-            'title': title,
-            'content': content,
-            'success': True
-        }
-        
+        return _parse_page(url, _fetch_html(url, _html_budget(max_chars)), max_chars)
+    
     except Exception as e:
         logger.error(f"Error fetching {url}: {e}")
         return {
@@ -107,6 +188,7 @@ def fetch_and_extract(url: str, max_chars: int = 3000) -> Dict[str, str]:
         }
 
 
+@ttl_cache(maxsize=128, ttl=3600, cache_if=lambda result: result['error'] is None and result['pages'])
 def search_and_read(query: str, num_results: int = 3, max_chars_per_page: int = 2000) -> Dict:
     """Search web and read top results.
     
@@ -114,7 +196,7 @@ def search_and_read(query: str, num_results: int = 3, max_chars_per_page: int =
         query: Search query
         num_results: Number of results to read
         max_chars_per_page: Max characters per page
-        
+    
     Returns:
         Dict with search results and page contents
     """
@@ -131,23 +213,17 @@ def search_and_read(query: str, num_results: int = 3, max_chars_per_page: int =
             'error': 'No valid search results'
         }
     
-    # Step 2: Fetch pages in parallel (faster)
+    # Step 2: Fetch and parse pages in parallel threads (network-bound)
     urls = [r['link'] for r in search_results if r.get('link')][:num_results]
     
-    pages = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as executor:
-        future_to_url = {
-            executor.submit(fetch_and_extract, url, max_chars_per_page): url 
-            for url in urls
-        }
-        
-        for future in concurrent.futures.as_completed(future_to_url):
-            try:
-                page_data = future.result()
-                if page_data['success'] and page_data['content']:
-                    pages.append(page_data)
-            except Exception as e:
-                logger.error(f"Error processing page: {e}")
+    # Threads only wait on the network; the pool persists between searches.
+    # fetch_and_extract's per-URL cache skips pages read in earlier searches.
+    pages = [
+        page for page in _get_fetch_pool().map(
+            lambda url: fetch_and_extract(url, max_chars_per_page), urls
+        )
+        if page['success'] and page['content']
+    ]
     
     return {
         'query': query,
@@ -162,7 +238,7 @@ def format_search_and_read_results(data: Dict) -> str:
     
     Args:
         data: Result from search_and_read
-        
+    
     Returns:
         Formatted text for AI context
     """
@@ -174,8 +250,7 @@ def format_search_and_read_results(data: Dict) -> str:
     # Add search results overview
     output.append("**Search Results:**")
     for i, result in enumerate(data['search_results'], 1):
-        output.append(f"{i}. {result['title']}")
-        output.append(f"   {result['link']}")
+        output.append(f"{i}. {result['title']}\n   {result['link']}")
     output.append("")
     
     # Add page contents
@@ -183,14 +258,11 @@ def format_search_and_read_results(data: Dict) -> str:
         output.append("**Content from Top Pages:**")
         output.append("")
         
+        # One block per page rather than an append per line
         for i, page in enumerate(data['pages'], 1):
-            output.append(f"### Source {i}: {page['title']}")
-            output.append(f"URL: {page['url']}")
-            output.append("")
-            output.append(page['content'])
-            output.append("")
-            output.append("---")
-            output.append("")
+            output.append(
+                f"### Source {i}: {page['title']}\nURL: {page['url']}\n\n{page['content']}\n\n---\n"
+            )
     else:
         output.append("*No page content could be extracted.*")
     
@@ -1,9 +1,24 @@
-"""Web search with Google Custom Search API."""
+"""Web search with Google Custom Search API or DuckDuckGo."""
 
+import concurrent.futures
+import itertools
 import os
-import requests
+import orjson
 from typing import List, Dict
+from core.cache import ttl_cache
 from core.logger import logger
+from tools.http_client import get_session
+
+
+def _google_page(params: Dict[str, str], start: int, num: int) -> List[Dict]:
+    """Fetch one page of Google Custom Search items."""
+    response = get_session().get(
+        "https://www.googleapis.com/customsearch/v1",
+        params={**params, "start": start, "num": num},
+        timeout=10
+    )
+    response.raise_for_status()
+    return orjson.loads(response.content).get("items", [])
 
 
 def search_google(query: str, max_results: int = 5) -> List[Dict[str, str]]:
@@ -11,7 +26,7 @@ def search_google(query: str, max_results: int = 5) -> List[Dict[str, str]]:
     
     Args:
         query: Search query
-        max_results: Maximum results (max 10)
+        max_results: Maximum results (max 100)
         
     Returns:
         List of search results
@@ -28,27 +43,32 @@ def search_google(query: str, max_results: int = 5) -> List[Dict[str, str]]:
         }]
     
     try:
-        url = "https://www.googleapis.com/customsearch/v1"
         params = {
             "key": api_key,
             "cx": search_engine_id,
-            "q": query,
-            "num": min(max_results, 10)  # Google allows max 10 per request
+            "q": query
         }
         
-        logger.info(f"Google Custom Search: {query}")
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
+        # Google returns at most 10 results per request (and 100 in total),
+        # so larger requests are split into pages fetched in parallel
+        max_results = max(1, min(max_results, 100))
+        pages = [
+            (start, min(10, max_results - start + 1))
+            for start in range(1, max_results + 1, 10)
+        ]
         
-        data = response.json()
-        results = []
+        logger.info(f"Google Custom Search: {query}")
+        if len(pages) == 1:
+            page_items = [_google_page(params, *pages[0])]
+        else:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(pages)) as executor:
+                page_items = list(executor.map(lambda page: _google_page(params, *page), pages))
         
-        for item in data.get("items", []):
-            results.append({
-                "title": item.get("title", ""),
-                "link": item.get("link", ""),
-                "snippet": item.get("snippet", "")
-            })
+        results = [{
+            "title": item.get("title", ""),
+            "link": item.get("link", ""),
+            "snippet": item.get("snippet", "")
+        } for item in itertools.chain.from_iterable(page_items)]
         
         logger.info(f"Google Search: Found {len(results)} results")
         return results
@@ -62,17 +82,75 @@ def search_google(query: str, max_results: int = 5) -> List[Dict[str, str]]:
         }]
 
 
-def search_web(query: str, max_results: int = 5) -> List[Dict[str, str]]:
-    """Search the web using Google Custom Search.
+def search_duckduckgo(query: str, max_results: int = 5) -> List[Dict[str, str]]:
+    """Search using DuckDuckGo (no API key needed).
+    
+    Args:
+        query: Search query
+        max_results: Maximum results
+        
+    Returns:
+        List of search results
+    """
+    try:
+        # Imported here so its dependencies load only when this backend is used
+        from duckduckgo_search import DDGS
+    except ImportError:
+        logger.error("duckduckgo-search is not installed")
+        return [{
+            "title": "DuckDuckGo Search Not Installed",
+            "link": "",
+            "snippet": "Please install duckduckgo-search or configure Google Custom Search"
+        }]
+    
+    try:
+        logger.info(f"DuckDuckGo Search: {query}")
+        with DDGS() as ddgs:
+            items = ddgs.text(query, max_results=max_results)
+        
+        results = [{
+            "title": item.get("title", ""),
+            "link": item.get("href", ""),
+            "snippet": item.get("body", "")
+        } for item in items]
+        
+        logger.info(f"DuckDuckGo Search: Found {len(results)} results")
+        return results
+        
+    except Exception as e:
+        logger.error(f"DuckDuckGo Search error: {e}")
+        return [{
+            "title": "Search Error",
+            "link": "",
+            "snippet": f"Error: {str(e)}"
+        }]
+
+
+_BACKENDS = {"google": search_google, "duckduckgo": search_duckduckgo}
+
+
+# Error placeholders have no link, so only real results are cached
+@ttl_cache(maxsize=256, ttl=300, cache_if=lambda results: all(r['link'] for r in results))
+def search_web(query: str, max_results: int = 5, backend: str = "auto") -> List[Dict[str, str]]:
+    """Search the web.
     
     Args:
         query: Search query
         max_results: Maximum results
+        backend: 'google', 'duckduckgo', or 'auto' (Google when its API
+            key and search engine ID are set, else DuckDuckGo)
         
     Returns:
         List of search results
     """
-    return search_google(query, max_results)
+    if backend == "auto":
+        configured = os.getenv("GOOGLE_API_KEY") and os.getenv("GOOGLE_SEARCH_ENGINE_ID")
+        backend = "google" if configured else "duckduckgo"
+    
+    if backend not in _BACKENDS:
+        raise ValueError(f"Invalid search backend: {backend}")
+    
+    return _BACKENDS[backend](query, max_results)
 
 
 def format_search_results(results: List[Dict[str, str]]) -> str:
@@ -88,12 +166,10 @@ def format_search_results(results: List[Dict[str, str]]) -> str:
         return "No results found."
     
     output = []
+    # One block per result rather than an append per line
     for i, result in enumerate(results, 1):
-        output.append(f"{i}. **{result['title']}**")
-        if result['link']:
-            output.append(f"   🔗 {result['link']}")
-        output.append(f"   {result['snippet']}")
-        output.append("")
+        link = f"   🔗 {result['link']}\n" if result['link'] else ""
+        output.append(f"{i}. **{result['title']}**\n{link}   {result['snippet']}\n")
     
     return "\n".join(output)
 